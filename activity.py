@@ -0,0 +1,111 @@
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+SECONDS_PER_DAY = 86400
+
+
+class ActivityPartition:
+    # Events of one day kept column by column, 26 bytes per event:
+    # timestamp (double), student row (uint32), course index (uint16), points (int64), submissions (uint32)
+    def __init__(self, course_count):
+        self.timestamps = array('d')
+        self.rows = array('I')
+        self.course_indexes = array('H')
+        self.points = array('q')
+        self.submissions = array('I')
+        self.ordered = True  # False once an event arrived with an earlier timestamp than the last one
+        # Pre-aggregated per-course bucket of the day
+        self.event_totals = array('q', [0] * course_count)
+        self.point_totals = array('q', [0] * course_count)
+        self.submission_totals = array('q', [0] * course_count)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append(self, timestamp, row, course_index, points, submissions):
+        if course_index >= len(self.event_totals):
+            # A course was added to the catalog after the partition was created
+            missing = course_index + 1 - len(self.event_totals)
+            for totals in (self.event_totals, self.point_totals, self.submission_totals):
+                totals.extend([0] * missing)
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            self.ordered = False
+        self.timestamps.append(timestamp)
+        self.rows.append(row)
+        self.course_indexes.append(course_index)
+        self.points.append(points)
+        self.submissions.append(submissions)
+        self.event_totals[course_index] += 1
+        self.point_totals[course_index] += points
+        self.submission_totals[course_index] += submissions
+
+    def course_totals(self, course_index):
+        # (events, points, submissions) of one course, courses added after the partition's last event read as 0
+        if course_index >= len(self.event_totals):
+            return 0, 0, 0
+        return (self.event_totals[course_index], self.point_totals[course_index],
+                self.submission_totals[course_index])
+
+    def positions(self, start, end):
+        # Positions of the events with start <= timestamp < end
+        if self.ordered:
+            return range(bisect_left(self.timestamps, start), bisect_left(self.timestamps, end))
+        return [i for i, timestamp in enumerate(self.timestamps) if start <= timestamp < end]
+
+
+class ActivityLog:
+    # Append-only log of point changes partitioned by UTC day. Range queries only touch the
+    # partitions of the requested days, and per-day statistics are read from the partitions'
+    # pre-aggregated buckets instead of the raw events. The clock can be replaced in tests.
+    def __init__(self, courses, clock=time.time):
+        self.courses = courses
+        self.clock = clock
+        self.partitions = {}  # Day number -> ActivityPartition
+        self.days = []  # Sorted day numbers
+
+    def __len__(self):
+        return sum(len(partition) for partition in self.partitions.values())
+
+    @staticmethod
+    def day_of(timestamp):
+        return int(timestamp // SECONDS_PER_DAY)
+
+    def record(self, timestamp, row, course_index, points, submissions):
+        day = self.day_of(timestamp)
+        partition = self.partitions.get(day)
+        if partition is None:
+            partition = self.partitions[day] = ActivityPartition(len(self.courses))
+            insort(self.days, day)
+        partition.append(timestamp, row, course_index, points, submissions)
+
+    def partitions_between(self, first_day, last_day):
+        for day in self.days[bisect_left(self.days, first_day):bisect_right(self.days, last_day)]:
+            yield day, self.partitions[day]
+
+    def iter_events(self, start, end):
+        # Yields (timestamp, row, course, points, submissions) for start <= timestamp < end
+        for _, partition in self.partitions_between(self.day_of(start), self.day_of(end)):
+            for i in partition.positions(start, end):
+                yield (partition.timestamps[i], partition.rows[i], self.courses[partition.course_indexes[i]],
+                       partition.points[i], partition.submissions[i])
+
+    def daily_totals(self, first_day, last_day):
+        # Yields (day, {course: (events, points, submissions)}) for the days that have events
+        for day, partition in self.partitions_between(first_day, last_day):
+            yield day, {course: partition.course_totals(i) for i, course in enumerate(self.courses)}
+
+    def window_totals(self, days, now=None):
+        # {course: (events, points, submissions)} over the last `days` days including today
+        last_day = self.day_of(self.clock() if now is None else now)
+        event_totals = [0] * len(self.courses)
+        point_totals = [0] * len(self.courses)
+        submission_totals = [0] * len(self.courses)
+        for _, partition in self.partitions_between(last_day - days + 1, last_day):
+            for i in range(len(self.courses)):
+                events, points, submissions = partition.course_totals(i)
+                event_totals[i] += events
+                point_totals[i] += points
+                submission_totals[i] += submissions
+        return {course: (event_totals[i], point_totals[i], submission_totals[i])
+                for i, course in enumerate(self.courses)}
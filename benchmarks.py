@@ -0,0 +1,450 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+from export import EXPORT_FORMATS
+from metrics import LatencyHistogram
+from progress_tracker import ID_GENERATORS
+from progress_tracker import CourseCounts
+from progress_tracker import LearningProgressTracker
+from progress_tracker import Notification
+from progress_tracker import Statistics
+from server import TrackerServer
+from student import Student
+
+FIRST_NAMES = ["John", "Jane", "Robert", "Anna", "Jean-Claude", "Mary", "O'Neill", "Li"]
+LAST_NAMES = ["Doe", "Spark", "Van de Graaff", "Smith", "O'Connor", "Lee", "Brown", "Garcia"]
+
+
+def generate_points_lines(count, seed=0):
+    rng = random.Random(seed)
+    student_ids = [LearningProgressTracker.hash_student_id(i) for i in range(1, 1001)]
+    return [f"{rng.choice(student_ids)} {rng.randrange(20)} {rng.randrange(20)} {rng.randrange(20)} {rng.randrange(20)}"
+            for _ in range(count)]
+
+
+def generate_credentials(count, seed=0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} student{i}@university{i % 50}.edu"
+            for i in range(count)]
+
+
+def generate_student_points_lines(student_ids, lines_per_student=4, seed=0):
+    rng = random.Random(seed)
+    return [f"{student_id} {rng.randrange(200)} {rng.randrange(150)} {rng.randrange(160)} {rng.randrange(180)}"
+            for _ in range(lines_per_student) for student_id in student_ids]
+
+
+def legacy_parse_points(points):
+    # Validation and parsing as they worked before the fast path: an uncompiled pattern and a second split
+    if not re.match(r'^\w+( \d+){4}$', points):
+        return None
+    data = points.split()
+    return data[0], [int(x) for x in data[1:]]
+
+
+def legacy_student_record(student_id, first_name, last_name, email, courses):
+    # Student record as it was stored before Student: one dict per student
+    return {"id": student_id,
+            "first_name": first_name.title(),
+            "last_name": last_name.title(),
+            "email": email.lower(),
+            "course_points": CourseCounts.fromkeys(courses, 0),
+            "course_submissions": CourseCounts.fromkeys(courses, 0)}
+
+
+def slotted_student_record(student_id, first_name, last_name, email, courses):
+    return Student(student_id, first_name.title(), last_name.title(), email.lower(),
+                   CourseCounts.fromkeys(courses, 0), CourseCounts.fromkeys(courses, 0))
+
+
+def measure_lines_per_second(parse, lines):
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def benchmark_points_parsing(line_count):
+    lines = generate_points_lines(line_count)
+    return {"legacy": measure_lines_per_second(legacy_parse_points, lines),
+            "fast path": measure_lines_per_second(LearningProgressTracker().parse_points_line, lines)}
+
+
+@contextlib.contextmanager
+def silenced_stdout():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def timed(results, operation, students, calls, function):
+    start = time.perf_counter()
+    with silenced_stdout():
+        function()
+    seconds = time.perf_counter() - start
+    results.append({"operation": operation,
+                    "students": students,
+                    "calls": calls,
+                    "seconds": seconds,
+                    "calls_per_second": calls / seconds if seconds else None})
+
+
+def benchmark_tracker(student_count, lookups=10_000, seed=0):
+    # Times every tracker operation once on a freshly generated cohort of the given size
+    results = []
+    rng = random.Random(seed)
+    credentials = generate_credentials(student_count, seed)
+    tracker = LearningProgressTracker()
+    statistics = Statistics(tracker.courses, tracker.course_completion_requirements)
+    notification = Notification(tracker.courses, tracker.course_completion_requirements)
+
+    def add_students():
+        for line in credentials:
+            tracker.add_students(line)
+
+    timed(results, "add_students", student_count, student_count, add_students)
+    student_ids = [student["id"] for student in tracker.students]
+    points_lines = generate_student_points_lines(student_ids, seed=seed)
+
+    def add_points():
+        for line in points_lines:
+            tracker.add_points(line)
+
+    timed(results, "add_points", student_count, len(points_lines), add_points)
+    lookup_ids = [rng.choice(student_ids) for _ in range(lookups)]
+
+    def find_students():
+        for student_id in lookup_ids:
+            tracker.find_student_by_id(student_id)
+
+    timed(results, "find_student_by_id", student_count, lookups, find_students)
+    timed(results, "calculate_course_statistics", student_count, 1,
+          lambda: statistics.calculate_course_statistics(tracker.students))
+    timed(results, "show_course_top_learners", student_count, 1,
+          lambda: statistics.show_course_top_learners("python", tracker.students))
+    timed(results, "notify_students", student_count, 1, lambda: notification.notify_students(tracker.students))
+    return results
+
+
+def run_suite(sizes):
+    results = []
+    for size in sizes:
+        results.extend(benchmark_tracker(size))
+        print(f"finished {size} students", file=sys.stderr)
+    return results
+
+
+async def run_server_load(student_count, clients, requests_per_client, seed):
+    rng = random.Random(seed)
+    tracker = LearningProgressTracker()
+    tracker.add_students_bulk(generate_credentials(student_count, seed))
+    student_ids = [student["id"] for student in tracker.students]
+    server = await TrackerServer(tracker).start()
+    port = server.sockets[0].getsockname()[1]
+    latencies = []
+
+    async def client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for i in range(requests_per_client):
+            student_id = rng.choice(student_ids)
+            request = (f"ADD_POINTS {student_id} {rng.randrange(20)} 0 {rng.randrange(20)} 0" if i % 4
+                       else f"TOP python 10 {rng.randrange(100)}" if i % 8 else f"FIND {student_id}")
+            start = time.perf_counter()
+            writer.write(request.encode() + b"\n")
+            await writer.drain()
+            await reader.readline()
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+        await writer.wait_closed()
+
+    async with server:
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {"operation": "server",
+            "students": student_count,
+            "clients": clients,
+            "calls": len(latencies),
+            "seconds": seconds,
+            "calls_per_second": len(latencies) / seconds,
+            "p50_latency_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_latency_ms": latencies[int(len(latencies) * 0.99)] * 1000}
+
+
+def benchmark_server(student_count, clients, requests_per_client, seed=0):
+    # Mix of writes (3/4), top-learner pages and lookups from concurrent local clients
+    return asyncio.run(run_server_load(student_count, clients, requests_per_client, seed))
+
+
+def benchmark_threads(student_count, thread_counts, seed=0):
+    # Splits the same add_points workload across growing numbers of writer threads.
+    # The first row is the single-threaded tracker without locks for reference.
+    results = []
+    credentials = generate_credentials(student_count, seed)
+    for threads, thread_safe in [(1, False)] + [(count, True) for count in thread_counts]:
+        tracker = LearningProgressTracker(thread_safe=thread_safe)
+        tracker.add_students_bulk(credentials)
+        student_ids = [student["id"] for student in tracker.students]
+        points_lines = generate_student_points_lines(student_ids, seed=seed)
+        workers = [threading.Thread(target=lambda lines: [tracker.add_points(line) for line in lines],
+                                    args=(points_lines[i::threads],)) for i in range(threads)]
+
+        start = time.perf_counter()
+        with silenced_stdout():
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        seconds = time.perf_counter() - start
+        results.append({"threads": threads,
+                        "thread_safe": thread_safe,
+                        "lines": len(points_lines),
+                        "seconds": seconds,
+                        "lines_per_second": len(points_lines) / seconds})
+    return results
+
+
+def benchmark_id_allocation(student_count, seed=0):
+    # Raw id generation and bulk student creation with every id scheme
+    results = []
+    credentials = generate_credentials(student_count, seed)
+    for scheme, generator_class in ID_GENERATORS.items():
+        generator = generator_class()
+        start = time.perf_counter()
+        for counter in range(1, student_count + 1):
+            generator.generate_id(counter)
+        generate_seconds = time.perf_counter() - start
+
+        tracker = LearningProgressTracker(id_generator=generator_class())
+        start = time.perf_counter()
+        tracker.add_students_bulk(credentials)
+        bulk_seconds = time.perf_counter() - start
+        results.append({"scheme": scheme,
+                        "students": student_count,
+                        "ids_per_second": student_count / generate_seconds,
+                        "bulk_students_per_second": student_count / bulk_seconds})
+    return results
+
+
+def benchmark_course_counts(student_count, course_counts, seed=0):
+    # Tracker operations with a generated catalog of every given size. Each points line
+    # touches a few courses, the rest of its numbers are zeros.
+    results = []
+    credentials = generate_credentials(student_count, seed)
+    for course_count in course_counts:
+        rng = random.Random(seed)
+        catalog = {f"Course{i}": 500 for i in range(course_count)}
+        for columnar in (False, True):
+            tracker = LearningProgressTracker(columnar=columnar, course_catalog=catalog)
+            statistics = Statistics(tracker.courses, tracker.course_completion_requirements)
+            tracker.add_students_bulk(credentials)
+            student_ids = [student["id"] for student in tracker.students]
+            points_lines = []
+            for student_id in student_ids * 2:
+                points = [0] * course_count
+                for course_index in rng.sample(range(course_count), min(3, course_count)):
+                    points[course_index] = rng.randrange(1, 200)
+                points_lines.append(f"{student_id} {' '.join(map(str, points))}")
+
+            operations = []
+            timed(operations, "add_points", student_count, len(points_lines),
+                  lambda: [tracker.add_points(line) for line in points_lines])
+            timed(operations, "print_student_points", student_count, len(student_ids),
+                  lambda: [tracker.print_student_points(student_id) for student_id in student_ids])
+            if columnar:
+                timed(operations, "calculate_course_statistics", student_count, 1,
+                      lambda: statistics.calculate_course_statistics_from_store(tracker.course_store))
+            else:
+                timed(operations, "calculate_course_statistics", student_count, 1,
+                      lambda: statistics.calculate_course_statistics(tracker.students))
+            timed(operations, "add_course", student_count, 1, lambda: tracker.add_course("Extra", 500))
+            for operation in operations:
+                operation.update({"courses": course_count, "columnar": columnar})
+            results.extend(operations)
+    return results
+
+
+def traced_bytes(function):
+    tracemalloc.start()
+    try:
+        result = function()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_student_memory(student_count, seed=0):
+    # Traced bytes per student for the records alone and for whole trackers
+    results = {}
+    courses = list(LearningProgressTracker().courses)
+    credentials = [LearningProgressTracker.parse_credentials(line) for line in generate_credentials(student_count, seed)]
+    student_ids = [LearningProgressTracker.hash_student_id(i) for i in range(1, student_count + 1)]
+    for name, make_record in (("dict records", legacy_student_record), ("slotted records", slotted_student_record)):
+        size, _ = traced_bytes(lambda: [make_record(student_id, *student_credentials, courses)
+                                        for student_id, student_credentials in zip(student_ids, credentials)])
+        results[name] = size / student_count
+    for name, columnar in (("tracker", False), ("columnar tracker", True)):
+        tracker = LearningProgressTracker(columnar=columnar)
+        size, _ = traced_bytes(lambda: tracker.add_students_bulk(credentials))
+        results[name] = size / student_count
+    return results
+
+
+def benchmark_snapshots(student_count, report_interval=0.05, seed=0):
+    # add_points throughput and latency of one writer thread while a reader thread runs a full-scan
+    # statistics report every report_interval seconds, either holding the tracker's locks for a
+    # consistent view or from a snapshot
+    results = []
+    credentials = generate_credentials(student_count, seed)
+    for columnar in (False, True):
+        for reader in (None, "locked", "snapshot"):
+            tracker = LearningProgressTracker(columnar=columnar, thread_safe=True)
+            tracker.add_students_bulk(credentials)
+            student_ids = [student["id"] for student in tracker.students]
+            points_lines = generate_student_points_lines(student_ids, seed=seed)
+            statistics = Statistics(tracker.courses, tracker.course_completion_requirements)
+            done = threading.Event()
+            reports = []
+
+            def locked_report():
+                with contextlib.ExitStack() as locks:
+                    for lock in [tracker.registry_lock, *tracker.point_locks, tracker.aggregates_lock]:
+                        locks.enter_context(lock)
+                    statistics.calculate_course_statistics(tracker.students)
+
+            def snapshot_report():
+                with tracker.take_snapshot() as snapshot:
+                    statistics.calculate_course_statistics(snapshot.students)
+
+            def read():
+                report = locked_report if reader == "locked" else snapshot_report
+                while not done.is_set():
+                    start = time.perf_counter()
+                    report()
+                    reports.append(time.perf_counter() - start)
+                    done.wait(report_interval)
+
+            start = time.perf_counter()
+            tracker.take_snapshot().close()
+            snapshot_seconds = time.perf_counter() - start
+            reader_thread = threading.Thread(target=read) if reader is not None else None
+            latency = LatencyHistogram()
+            longest = 0.0
+            with silenced_stdout():
+                start = time.perf_counter()
+                if reader_thread is not None:
+                    reader_thread.start()
+                for line in points_lines:
+                    line_start = time.perf_counter()
+                    tracker.add_points(line)
+                    line_seconds = time.perf_counter() - line_start
+                    latency.record(line_seconds)
+                    longest = max(longest, line_seconds)
+                seconds = time.perf_counter() - start
+                done.set()
+                if reader_thread is not None:
+                    reader_thread.join()
+            results.append({"columnar": columnar,
+                            "reader": reader,
+                            "students": student_count,
+                            "take_snapshot_ms": snapshot_seconds * 1000,
+                            "lines_per_second": len(points_lines) / seconds,
+                            "add_points_p99_ms": latency.percentile(99) * 1000,
+                            "add_points_max_ms": longest * 1000,
+                            "reports": len(reports),
+                            "report_ms": sum(reports) / len(reports) * 1000 if reports else None})
+    return results
+
+
+def benchmark_export(student_count, directory, seed=0):
+    # Seconds and bytes of a full export in every format, from a dict-backed and a columnar tracker
+    results = []
+    credentials = generate_credentials(student_count, seed)
+    for columnar in (False, True):
+        tracker = LearningProgressTracker(columnar=columnar)
+        tracker.add_students_bulk(credentials)
+        student_ids = [student["id"] for student in tracker.students]
+        tracker.add_points_bulk(generate_student_points_lines(student_ids, lines_per_student=1, seed=seed))
+        for file_format in EXPORT_FORMATS:
+            format_directory = os.path.join(directory, f"{'columnar' if columnar else 'dict'}-{file_format}")
+            start = time.perf_counter()
+            rows = tracker.export(format_directory, file_format)
+            seconds = time.perf_counter() - start
+            results.append({"columnar": columnar,
+                            "format": file_format,
+                            "students": student_count,
+                            "rows": rows,
+                            "seconds": seconds,
+                            "bytes": sum(entry.stat().st_size for entry in os.scandir(format_directory))})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learning Progress Tracker benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    parsing_parser = subparsers.add_parser("parsing", help="points line parsing throughput")
+    parsing_parser.add_argument("--lines", type=int, default=1_000_000, help="number of synthetic points lines")
+    suite_parser = subparsers.add_parser("suite", help="every tracker operation at growing cohort sizes")
+    suite_parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                              help="cohort sizes to benchmark, e.g. 1000 10000 100000 1000000")
+    suite_parser.add_argument("--json", help="write the results to this file instead of stdout")
+    server_parser = subparsers.add_parser("server", help="requests/sec and latency of the TCP front end")
+    server_parser.add_argument("--students", type=int, default=10_000)
+    server_parser.add_argument("--clients", type=int, default=50)
+    server_parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    threads_parser = subparsers.add_parser("threads", help="add_points throughput of a thread-safe tracker")
+    threads_parser.add_argument("--students", type=int, default=10_000)
+    threads_parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    ids_parser = subparsers.add_parser("ids", help="student id allocation throughput per id scheme")
+    ids_parser.add_argument("--students", type=int, default=1_000_000)
+    courses_parser = subparsers.add_parser("courses", help="tracker operations at growing catalog sizes")
+    courses_parser.add_argument("--students", type=int, default=10_000)
+    courses_parser.add_argument("--courses", type=int, nargs="+", default=[4, 50, 500])
+    memory_parser = subparsers.add_parser("memory", help="bytes per student of the student records")
+    memory_parser.add_argument("--students", type=int, default=1_000_000)
+    snapshots_parser = subparsers.add_parser("snapshots", help="add_points throughput next to a statistics reader")
+    snapshots_parser.add_argument("--students", type=int, default=10_000)
+    export_parser = subparsers.add_parser("export", help="full export time and size per format")
+    export_parser.add_argument("--students", type=int, default=1_000_000)
+    export_parser.add_argument("--directory", default="export-benchmark", help="where the exports are written")
+    arguments = parser.parse_args()
+
+    if arguments.benchmark == "parsing":
+        for name, lines_per_second in benchmark_points_parsing(arguments.lines).items():
+            print(f"{name:<10} {lines_per_second:>12,.0f} lines/sec")
+    elif arguments.benchmark == "server":
+        print(json.dumps(benchmark_server(arguments.students, arguments.clients, arguments.requests), indent=2))
+    elif arguments.benchmark == "ids":
+        print(json.dumps(benchmark_id_allocation(arguments.students), indent=2))
+    elif arguments.benchmark == "courses":
+        print(json.dumps(benchmark_course_counts(arguments.students, arguments.courses), indent=2))
+    elif arguments.benchmark == "memory":
+        for name, bytes_per_student in benchmark_student_memory(arguments.students).items():
+            print(f"{name:<18} {bytes_per_student:>8.1f} bytes/student")
+    elif arguments.benchmark == "export":
+        print(json.dumps(benchmark_export(arguments.students, arguments.directory), indent=2))
+    elif arguments.benchmark == "snapshots":
+        print(json.dumps(benchmark_snapshots(arguments.students), indent=2))
+    elif arguments.benchmark == "threads":
+        print(json.dumps(benchmark_threads(arguments.students, arguments.threads), indent=2))
+    else:
+        results = json.dumps(run_suite(arguments.sizes), indent=2)
+        if arguments.json is None:
+            print(results)
+        else:
+            with open(arguments.json, "w") as file:
+                file.write(results + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import csv
+import json
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from json.encoder import encode_basestring_ascii
+
+# Rows per chunk. Every table is written one chunk at a time, each chunk holds one list or array per column.
+CHUNK_ROWS = 65536
+
+STATISTIC_NAMES = {"MP": "Most popular",
+                   "LP": "Least popular",
+                   "HA": "Highest activity",
+                   "LA": "Lowest activity",
+                   "EC": "Easiest course",
+                   "HC": "Hardest course"}
+
+LEADERBOARD_SCHEMA = [("course", "str"), ("rank", "int"), ("id", "str"), ("points", "int"), ("completion", "float")]
+STATISTICS_SCHEMA = [("statistic", "str"), ("courses", "str")]
+
+COLUMNAR_MAGIC = b"LPTCOL1\0"
+COLUMNAR_TRAILER = struct.Struct("<Q8s")  # Footer length, magic
+COLUMN_ARRAY_TYPES = {"int": 'q', "float": 'd'}
+
+
+def student_schema(courses):
+    return ([("id", "str"), ("first_name", "str"), ("last_name", "str"), ("email", "str")]
+            + [(f"points:{course}", "int") for course in courses]
+            + [(f"submissions:{course}", "int") for course in courses])
+
+
+def student_chunks(snapshot, chunk_rows):
+    # Columnar snapshots hand out slices of their int64 columns, no per-student objects are built
+    for start in range(0, snapshot.student_count, chunk_rows):
+        end = min(start + chunk_rows, snapshot.student_count)
+        points_columns, submissions_columns = snapshot.course_columns(start, end)
+        yield [*snapshot.student_fields(start, end), *points_columns, *submissions_columns]
+
+
+def leaderboard_chunks(snapshot, statistics, chunk_rows):
+    for course in snapshot.courses:
+        leaderboard = snapshot.leaderboards[course]
+        completions = {}  # Points -> completion, most students share their points with others
+        for start in range(0, len(leaderboard), chunk_rows):
+            ids, points = leaderboard.columns(start, chunk_rows)
+            for course_points in set(points).difference(completions):
+                completions[course_points] = statistics.calculate_course_completion(course, course_points)
+            yield [[course] * len(ids),
+                   range(start + 1, start + len(ids) + 1),
+                   ids,
+                   points,
+                   list(map(completions.__getitem__, points))]
+
+
+def statistics_chunks(snapshot, statistics):
+    if snapshot.student_count:
+        statistics.update_statistics_from_totals(*snapshot.course_totals())
+    values = statistics.get_statistics()
+    yield [list(STATISTIC_NAMES.values()), [values[key] for key in STATISTIC_NAMES]]
+
+
+class TableWriter:
+    def __init__(self, path, schema):
+        self.schema = schema
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_chunk(self, columns):
+        self.rows += len(columns[0])
+
+
+class CsvTableWriter(TableWriter):
+    EXTENSION = ".csv"
+
+    def __init__(self, path, schema):
+        super().__init__(path, schema)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in schema])
+
+    def write_chunk(self, columns):
+        super().write_chunk(columns)
+        self.writer.writerows(zip(*columns))
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesTableWriter(TableWriter):
+    # Every row goes through one str.format template with the keys already encoded,
+    # the values are encoded column by column
+    EXTENSION = ".jsonl"
+    ENCODERS = {"str": encode_basestring_ascii, "int": str, "float": float.__repr__}
+
+    def __init__(self, path, schema):
+        super().__init__(path, schema)
+        self.file = open(path, "w", encoding="utf-8")
+        fields = ", ".join(json.dumps(name).replace("{", "{{").replace("}", "}}") + ": {}" for name, _ in schema)
+        self.template = "{{" + fields + "}}\n"
+        self.encoders = [self.ENCODERS[kind] for _, kind in schema]
+
+    def write_chunk(self, columns):
+        super().write_chunk(columns)
+        encoded_columns = [map(encode, column) for encode, column in zip(self.encoders, columns)]
+        self.file.write("".join(map(self.template.format, *encoded_columns)))
+
+    def close(self):
+        self.file.close()
+
+
+class ColumnarTableWriter(TableWriter):
+    # Layout: magic, then one row group per chunk holding every column back to back, then a JSON
+    # footer with the schema and the offset and length of every column, its length and the magic again.
+    # Numbers are little-endian int64 or float64. A string column is a uint32 array of rows + 1 end
+    # offsets into the UTF-8 bytes that follow it. A reader only needs the footer to find any column.
+    EXTENSION = ".col"
+
+    def __init__(self, path, schema):
+        super().__init__(path, schema)
+        self.file = open(path, "wb")
+        self.file.write(COLUMNAR_MAGIC)
+        self.offset = len(COLUMNAR_MAGIC)
+        self.row_groups = []
+
+    def write_chunk(self, columns):
+        super().write_chunk(columns)
+        layout = []
+        for (_, kind), column in zip(self.schema, columns):
+            data = self.encode_column(kind, column)
+            layout.append([self.offset, len(data)])
+            self.file.write(data)
+            self.offset += len(data)
+        self.row_groups.append({"rows": len(columns[0]), "columns": layout})
+
+    @staticmethod
+    def encode_column(kind, column):
+        if kind == "str":
+            encoded = [value.encode() for value in column]
+            offsets = array('I', [0])
+            offsets.extend(accumulate(map(len, encoded)))
+            return little_endian_bytes(offsets) + b"".join(encoded)
+        if not isinstance(column, array) or column.typecode != COLUMN_ARRAY_TYPES[kind]:
+            column = array(COLUMN_ARRAY_TYPES[kind], column)
+        return little_endian_bytes(column)
+
+    def close(self):
+        footer = json.dumps({"schema": self.schema, "row_groups": self.row_groups}).encode()
+        self.file.write(footer)
+        self.file.write(COLUMNAR_TRAILER.pack(len(footer), COLUMNAR_MAGIC))
+        self.file.close()
+
+
+def little_endian_bytes(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+EXPORT_FORMATS = {"csv": CsvTableWriter, "jsonl": JsonLinesTableWriter, "columnar": ColumnarTableWriter}
+
+
+def export_snapshot(snapshot, statistics, directory, file_format, chunk_rows=CHUNK_ROWS):
+    # Writes students, leaderboards and statistics tables to the directory and returns the rows of each
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {file_format}")
+    writer_class = EXPORT_FORMATS[file_format]
+    os.makedirs(directory, exist_ok=True)
+    tables = [("students", student_schema(snapshot.courses), student_chunks(snapshot, chunk_rows)),
+              ("leaderboards", LEADERBOARD_SCHEMA, leaderboard_chunks(snapshot, statistics, chunk_rows)),
+              ("statistics", STATISTICS_SCHEMA, statistics_chunks(snapshot, statistics))]
+    rows = {}
+    for name, schema, chunks in tables:
+        with writer_class(os.path.join(directory, name + writer_class.EXTENSION), schema) as writer:
+            for chunk in chunks:
+                writer.write_chunk(chunk)
+        rows[name] = writer.rows
+    return rows
+
+
+def iter_columnar_row_groups(path):
+    # Yields every row group of a columnar export as {column: list of values}
+    with open(path, "rb") as file:
+        file.seek(-COLUMNAR_TRAILER.size, os.SEEK_END)
+        footer_length, magic = COLUMNAR_TRAILER.unpack(file.read(COLUMNAR_TRAILER.size))
+        if magic != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a columnar export")
+        file.seek(-COLUMNAR_TRAILER.size - footer_length, os.SEEK_END)
+        footer = json.loads(file.read(footer_length))
+
+        for row_group in footer["row_groups"]:
+            columns = {}
+            for (name, kind), (offset, length) in zip(footer["schema"], row_group["columns"]):
+                file.seek(offset)
+                columns[name] = decode_column(kind, file.read(length), row_group["rows"])
+            yield columns
+
+
+def decode_column(kind, data, rows):
+    if kind == "str":
+        offsets = read_array('I', data[:4 * (rows + 1)])
+        text = data[4 * (rows + 1):]
+        return [text[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+    return read_array(COLUMN_ARRAY_TYPES[kind], data).tolist()
+
+
+def read_array(typecode, data):
+    values = array(typecode, data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def read_columnar(path):
+    # Whole columnar export as {column: list of values}, for tests and small files
+    table = {}
+    for columns in iter_columnar_row_groups(path):
+        for name, values in columns.items():
+            table.setdefault(name, []).extend(values)
+    return table
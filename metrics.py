@@ -0,0 +1,174 @@
+import cProfile
+import contextlib
+import io
+import json
+import math
+import pstats
+import sys
+import time
+import tracemalloc
+
+
+class LatencyHistogram:
+    # Log-scale buckets, 8 per power of two, so percentiles are within about 9% of the real value
+    BUCKETS_PER_DOUBLING = 8
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+
+    def record(self, seconds):
+        nanoseconds = max(int(seconds * 1e9), 1)
+        bucket = int(math.log2(nanoseconds) * self.BUCKETS_PER_DOUBLING)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+
+    def percentile(self, percent):
+        # Upper bound of the bucket holding the given percentile, in seconds
+        if not self.total:
+            return None
+        rank = math.ceil(self.total * percent / 100)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return 2 ** ((bucket + 1) / self.BUCKETS_PER_DOUBLING) / 1e9
+
+
+class CountingWriter:
+    # Passes writes through to the wrapped stream and counts the characters written,
+    # which are the bytes printed for the ASCII output of the tracker
+    def __init__(self, stream):
+        self.stream = stream
+        self.written = 0
+
+    def write(self, text):
+        self.written += len(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class OperationMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows_scanned = 0
+        self.bytes_printed = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self):
+        p50 = self.latency.percentile(50)
+        p99 = self.latency.percentile(99)
+        return {"calls": self.calls,
+                "seconds": self.seconds,
+                "p50_ms": None if p50 is None else p50 * 1000,
+                "p99_ms": None if p99 is None else p99 * 1000,
+                "rows_scanned": self.rows_scanned,
+                "bytes_printed": self.bytes_printed}
+
+
+class Metrics:
+    # Instruments methods of single objects by replacing them with timed wrappers on the instance,
+    # so nothing changes for objects that were never instrumented. Printed output is counted by
+    # swapping sys.stdout, so measurements are meant for the single-threaded menu.
+    # With profile set, every measured command also records the top cProfile entries and the
+    # peak memory allocated while it ran.
+    PROFILE_ENTRIES = 15
+
+    def __init__(self, profile=False):
+        self.operations = {}
+        self.profile = profile
+        self.profiles = {}  # Command -> list of captures
+
+    def operation(self, name):
+        if name not in self.operations:
+            self.operations[name] = OperationMetrics()
+        return self.operations[name]
+
+    def instrument(self, target, method_name, rows_scanned=None, result_rows=None):
+        # rows_scanned maps the call arguments to the number of rows the call looks at,
+        # result_rows maps the result to it for calls that only know their rows once they are done
+        method = getattr(target, method_name)
+        name = f"{type(target).__name__}.{method_name}"
+        metrics = self
+
+        def instrumented(*args, **kwargs):
+            with metrics.measure(name) as operation:
+                if rows_scanned is not None:
+                    operation.rows_scanned += rows_scanned(*args, **kwargs)
+                result = method(*args, **kwargs)
+                if result_rows is not None:
+                    operation.rows_scanned += result_rows(result)
+                return result
+
+        setattr(target, method_name, instrumented)
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        operation = self.operation(name)
+        stdout = sys.stdout
+        writer = CountingWriter(stdout)
+        sys.stdout = writer
+        start = time.perf_counter()
+        try:
+            yield operation
+        finally:
+            seconds = time.perf_counter() - start
+            sys.stdout = stdout
+            operation.calls += 1
+            operation.seconds += seconds
+            operation.bytes_printed += writer.written
+            operation.latency.record(seconds)
+
+    @contextlib.contextmanager
+    def measure_command(self, command):
+        with self.measure(f"command:{command}"):
+            if not self.profile:
+                yield
+                return
+
+            profiler = cProfile.Profile()
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                current_memory, peak_memory = tracemalloc.get_traced_memory()
+                if not tracing:
+                    tracemalloc.stop()
+                self.profiles.setdefault(command, []).append({
+                    "allocated_bytes": current_memory - start_memory,
+                    "peak_bytes": peak_memory - start_memory,
+                    "profile": self.format_profile(profiler)})
+
+    def format_profile(self, profiler):
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(self.PROFILE_ENTRIES)
+        return report.getvalue()
+
+    def to_dict(self):
+        return {"operations": {name: operation.to_dict() for name, operation in sorted(self.operations.items())},
+                "profiles": self.profiles}
+
+    def dump(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def format_table(self):
+        lines = ["{:<44} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+            "operation", "calls", "p50 ms", "p99 ms", "rows", "bytes")]
+        for name, operation in sorted(self.operations.items()):
+            if not operation.calls:
+                continue
+            summary = operation.to_dict()
+            lines.append("{:<44} {:>8} {:>10.3f} {:>10.3f} {:>10} {:>10}".format(
+                name, summary["calls"], summary["p50_ms"], summary["p99_ms"],
+                summary["rows_scanned"], summary["bytes_printed"]))
+        return "\n".join(lines)
@@ -1,18 +1,829 @@
+import argparse
+import asyncio
+import contextlib
 import hashlib
+import io
+import json
+import math
+import multiprocessing
+import os
 import re
+import sys
+import threading
+import weakref
+from array import array
+from bisect import bisect_left, insort
+from collections import namedtuple
+from collections.abc import MutableMapping, Sequence
+from fractions import Fraction
+from itertools import chain, compress, islice
+from operator import itemgetter, neg
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from activity import ActivityLog
+from export import EXPORT_FORMATS, export_snapshot
+from metrics import Metrics
+from storage import MappedSnapshot, TrackerImage, TrackerStore, write_binary_snapshot
+from student import Student, StudentRecord
+
+# Name requirements:
+# - Only ASCII characters, hyphens and apostrophes
+# - Hyphens and apostrophes cannot be the first or the last characters
+# - Hyphens and apostrophes cannot be adjacent to each other
+# - Must be at least two characters long
+NAME_PATTERN = re.compile(r'^[a-z](?!.*[-\']{2})[a-z\' -]*[a-z]$', re.IGNORECASE)
+# Should contain name, the @ symbol, and domain
+EMAIL_PATTERN = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
+# Course name -> points required to complete it, used unless a catalog file is given
+DEFAULT_COURSE_CATALOG = {
+    "Python": 600,
+    "DSA": 400,
+    "Databases": 480,
+    "Flask": 550
+}
+
+
+def points_patterns(course_count):
+    # A points line is an id followed by one number per course. The second pattern validates
+    # a line and captures the id and all numbers in one match.
+    return (re.compile(rf'^\w+( \d+){{{course_count}}}$'),
+            re.compile(r'^(\w+)' + r' (\d+)' * course_count + '$'))
+
+
+PointsRecord = namedtuple("PointsRecord", ["student_id", "points"])
+
+
+def match_points_line(pattern, points):
+    # Single-pass fast path: returns a PointsRecord, or None when the line is malformed
+    match = pattern.match(points)
+    if match is None:
+        return None
 
+    groups = match.groups()
+    return PointsRecord(groups[0], list(map(int, groups[1:])))
+
+
+def rank_rows(rows_by_id, points):
+    # Rows with points in leaderboard order, (-points, id), given all rows sorted by id and a points column.
+    # Sorting the rows by id once and then stable sorting by points ranks every course without tuple keys.
+    rows = list(compress(rows_by_id, map(points.__getitem__, rows_by_id)))
+    rows.sort(key=points.__getitem__, reverse=True)
+    return array('I', rows)
+
+
+def load_course_catalog(path):
+    # Reads a JSON object mapping course names to the points required to complete them
+    with open(path) as file:
+        catalog = json.load(file)
+    if not isinstance(catalog, dict) or not catalog:
+        raise ValueError(f"{path} should map course names to required points")
+    names = set()
+    for course, requirement in catalog.items():
+        if not course or course.lower() in names:
+            raise ValueError(f"Course names in {path} should be unique and not empty")
+        if not isinstance(requirement, int) or isinstance(requirement, bool) or requirement <= 0:
+            raise ValueError(f"Requirement of {course} in {path} should be a positive integer")
+        names.add(course.lower())
+    return catalog
+
+
+class CourseCounts(dict):
+    # Per-course counts of a student, courses added after the student was registered read as 0
+    __slots__ = ()
+
+    def __missing__(self, course):
+        return 0
+
+
+class BulkResult:
+    def __init__(self):
+        self.accepted = 0
+        # (line number, reason) pairs, line numbers start at 1
+        self.rejected = []
+
+    def reject(self, line_number, reason):
+        self.rejected.append((line_number, reason))
+
+
+class ColumnarCourseStore:
+    # Keeps points and submissions in one contiguous int64 column per course,
+    # each column indexed by student row
+    def __init__(self, courses):
+        self.courses = courses
+        self.course_index = {course: i for i, course in enumerate(courses)}
+        self.points_columns = [array('q') for _ in courses]
+        self.submissions_columns = [array('q') for _ in courses]
+        self.rows = 0
+        # Copy-on-write for TrackerSnapshot: id of a column -> number of snapshots reading it.
+        # A shared column is never changed, it is copied on the first write and the copy replaces it.
+        self.shared_columns = {}
+        self.copy_lock = threading.RLock()
+
+    def add_course(self, course):
+        # A new course is one more zeroed column per kind, existing rows are left untouched
+        self.course_index[course] = len(self.points_columns)
+        self.points_columns.append(array('q', bytes(8 * self.rows)))
+        self.submissions_columns.append(array('q', bytes(8 * self.rows)))
+
+    def add_row(self):
+        if self.shared_columns:
+            for columns in (self.points_columns, self.submissions_columns):
+                for index in range(len(columns)):
+                    self.writable_column(columns, index)
+        for column in self.points_columns:
+            column.append(0)
+        for column in self.submissions_columns:
+            column.append(0)
+        self.rows += 1
+        return self.rows - 1
+
+    def add_rows(self, count):
+        # Appends count zeroed rows at once and returns the first of them
+        zeros = bytes(8 * count)
+        for columns in (self.points_columns, self.submissions_columns):
+            for index in range(len(columns)):
+                self.writable_column(columns, index).frombytes(zeros)
+        self.rows += count
+        return self.rows - count
+
+    def load_rows(self, start, courses, points, submissions):
+        # Fills the rows from start on out of row-major int64 arrays holding one count per course in courses,
+        # every column takes a strided slice instead of one write per student
+        for i, course in enumerate(courses):
+            index = self.course_index.get(course)
+            if index is not None:
+                self.writable_column(self.points_columns, index)[start:] = points[i::len(courses)]
+                self.writable_column(self.submissions_columns, index)[start:] = submissions[i::len(courses)]
+
+    def restore_columns(self, rows, points, submissions):
+        # Replaces every column with a stored int64 blob, one per course in course order
+        self.points_columns = [array('q', blob) for blob in points]
+        self.submissions_columns = [array('q', blob) for blob in submissions]
+        self.rows = rows
+
+    def share_columns(self):
+        # Current points and submissions columns, kept unchanged until release_columns
+        with self.copy_lock:
+            points_columns, submissions_columns = list(self.points_columns), list(self.submissions_columns)
+            for column in chain(points_columns, submissions_columns):
+                self.shared_columns[id(column)] = self.shared_columns.get(id(column), 0) + 1
+        return points_columns, submissions_columns
+
+    def release_columns(self, points_columns, submissions_columns):
+        with self.copy_lock:
+            for column in chain(points_columns, submissions_columns):
+                readers = self.shared_columns.pop(id(column)) - 1
+                if readers:
+                    self.shared_columns[id(column)] = readers
+
+    def writable_column(self, columns, index):
+        with self.copy_lock:
+            column = columns[index]
+            if id(column) in self.shared_columns:
+                column = columns[index] = array('q', column)
+            return column
+
+    def column_totals(self):
+        # Column reductions run in C via array.count and sum
+        course_enrollment = {}
+        course_submissions = {}
+        course_points = {}
+        for course, points_column, submissions_column in zip(self.courses, self.points_columns,
+                                                             self.submissions_columns):
+            course_enrollment[course] = len(points_column) - points_column.count(0)
+            course_submissions[course] = sum(submissions_column)
+            course_points[course] = sum(points_column)
+        return course_enrollment, course_submissions, course_points
+
+
+class CourseColumnsView(MutableMapping):
+    # Per-student mapping of course -> value backed by one row of a ColumnarCourseStore
+    __slots__ = ("store", "columns", "row")
+
+    def __init__(self, store, columns, row):
+        self.store = store
+        self.columns = columns
+        self.row = row
+
+    def __getitem__(self, course):
+        return self.columns[self.store.course_index[course]][self.row]
+
+    def __setitem__(self, course, value):
+        store = self.store
+        index = store.course_index[course]
+        if store.shared_columns:
+            store.writable_column(self.columns, index)[self.row] = value
+        else:
+            self.columns[index][self.row] = value
+
+    def __delitem__(self, course):
+        raise TypeError("Courses cannot be removed from a student")
+
+    def __iter__(self):
+        return iter(self.store.course_index)
+
+    def __len__(self):
+        return len(self.store.course_index)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class FrozenCourseColumnsView(CourseColumnsView):
+    # Row of a TrackerSnapshot, the columns are shared with the live store
+    __slots__ = ()
+
+    def __setitem__(self, course, value):
+        raise TypeError("Snapshots are read-only")
+
+
+class ColumnarStudent(StudentRecord):
+    # Student of a ColumnarCourseStore. Only the row is kept, the per-course mappings
+    # are views over the store's columns built when read.
+    __slots__ = ("store", "row")
+
+    def __init__(self, student_id, first_name, last_name, email, store, row):
+        super().__init__(student_id, first_name, last_name, email)
+        self.store = store
+        self.row = row
+
+    @property
+    def course_points(self):
+        return CourseColumnsView(self.store, self.store.points_columns, self.row)
+
+    @property
+    def course_submissions(self):
+        return CourseColumnsView(self.store, self.store.submissions_columns, self.row)
+
+
+class ColumnarStudents(Sequence):
+    # Registry of a columnar tracker: ids, names and emails are kept in one list per field and a
+    # ColumnarStudent is built when a row is read. Fields restored from a stored image stay
+    # encoded, one newline separated blob per field, until they are first read.
+    FIELD_COUNT = 4  # Id, first name, last name, email
+
+    def __init__(self, store):
+        self.store = store
+        self.fields = [[] for _ in range(self.FIELD_COUNT)]
+        self.encoded = [None] * self.FIELD_COUNT
+        self.count = 0
+        self.decode_lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return list(map(self.student, range(*row.indices(self.count))))
+        if row < 0:
+            row += self.count
+        if not 0 <= row < self.count:
+            raise IndexError("student row out of range")
+        return self.student(row)
+
+    def __iter__(self):
+        return map(self.student, range(self.count))
+
+    def student(self, row):
+        return ColumnarStudent(self.field(0)[row], self.field(1)[row], self.field(2)[row], self.field(3)[row],
+                               self.store, row)
+
+    def field(self, index):
+        values = self.fields[index]
+        if values is None:
+            with self.decode_lock:
+                values = self.fields[index]
+                if values is None:
+                    values = self.encoded[index].decode().split("\n") if self.count else []
+                    if index in (1, 2):
+                        values = list(map(sys.intern, values))
+                    self.fields[index] = values
+                    self.encoded[index] = None
+        return values
+
+    def encoded_field(self, index):
+        # Names never contain a newline, so a field is stored as one newline separated blob
+        if self.fields[index] is None:
+            return self.encoded[index]
+        return "\n".join(self.fields[index][:self.count]).encode()
+
+    def append(self, student_id, first_name, last_name, email):
+        for index, value in enumerate((student_id, sys.intern(first_name), sys.intern(last_name), email)):
+            self.field(index).append(value)
+        self.count += 1
+
+    def extend(self, ids, first_names, last_names, emails):
+        for index, values in enumerate((ids, map(sys.intern, first_names), map(sys.intern, last_names), emails)):
+            self.field(index).extend(values)
+        self.count += len(ids)
+
+    def restore(self, count, encoded_fields):
+        self.fields = [None] * self.FIELD_COUNT
+        self.encoded = list(encoded_fields)
+        self.count = count
+
+
+class Leaderboard:
+    # Students with points in a course ordered by (-points, id). Keys are kept in
+    # sorted blocks, so an update only shifts one block instead of the whole list.
+    # Block sizes are summed in a Fenwick tree, so positions are found in O(log N).
+    BLOCK_SIZE = 512
 
-class LearningProgressTracker:
     def __init__(self):
+        self.blocks = []
+        self.maxes = []  # Last key of every block
+        self.sizes = []  # Fenwick tree over the block sizes
+        self.points = {}  # Student id -> points
+        self.version = 0  # Bumped by every change, lets readers cache what they render
+
+    def __len__(self):
+        return len(self.points)
+
+    def update(self, student_id, points):
+        old_points = self.points.get(student_id)
+        if old_points == points:
+            return
+        if old_points is not None:
+            self._remove((-old_points, student_id))
+        self.points[student_id] = points
+        self._insert((-points, student_id))
+        self.version += 1
+
+    def _insert(self, key):
+        if not self.blocks:
+            self.blocks.append([key])
+            self.maxes.append(key)
+            self._build_sizes()
+            return
+
+        i = bisect_left(self.maxes, key)
+        if i == len(self.maxes):
+            i -= 1
+            self.blocks[i].append(key)
+            self.maxes[i] = key
+        else:
+            insort(self.blocks[i], key)
+
+        block = self.blocks[i]
+        if len(block) > 2 * self.BLOCK_SIZE:
+            self.blocks[i:i + 1] = [block[:self.BLOCK_SIZE], block[self.BLOCK_SIZE:]]
+            self.maxes[i:i + 1] = [block[self.BLOCK_SIZE - 1], block[-1]]
+            self._build_sizes()
+        else:
+            self._add_size(i, 1)
+
+    def _remove(self, key):
+        i = bisect_left(self.maxes, key)
+        block = self.blocks[i]
+        del block[bisect_left(block, key)]
+        if block:
+            self.maxes[i] = block[-1]
+            self._add_size(i, -1)
+        else:
+            del self.blocks[i]
+            del self.maxes[i]
+            self._build_sizes()
+
+    def _build_sizes(self):
+        # O(B), only needed when blocks are split, dropped or rebuilt
+        sizes = list(map(len, self.blocks))
+        for i in range(len(sizes)):
+            parent = i | (i + 1)
+            if parent < len(sizes):
+                sizes[parent] += sizes[i]
+        self.sizes = sizes
+
+    def _add_size(self, i, delta):
+        while i < len(self.sizes):
+            self.sizes[i] += delta
+            i |= i + 1
+
+    def _keys_before_block(self, i):
+        total = 0
+        while i > 0:
+            total += self.sizes[i - 1]
+            i &= i - 1
+        return total
+
+    def _locate(self, offset):
+        # (block index, offset inside that block) of a leaderboard position
+        i = 0
+        step = 1 << (len(self.sizes).bit_length() - 1) if self.sizes else 0
+        while step:
+            if i + step <= len(self.sizes) and self.sizes[i + step - 1] <= offset:
+                i += step
+                offset -= self.sizes[i - 1]
+            step >>= 1
+        return i, offset
+
+    def rank(self, student_id):
+        # 0-based position on the leaderboard or None for students without points
+        points = self.points.get(student_id)
+        if points is None:
+            return None
+
+        key = (-points, student_id)
+        i = bisect_left(self.maxes, key)
+        return self._keys_before_block(i) + bisect_left(self.blocks[i], key)
+
+    def iter_range(self, offset=0, limit=None):
+        # Yields (id, points) pairs starting at the given leaderboard position
+        return islice(self._iter_from(offset), limit)
+
+    def _iter_from(self, offset):
+        i, offset = self._locate(offset)
+        for i in range(i, len(self.blocks)):
+            for negative_points, student_id in self.blocks[i][offset:]:
+                yield student_id, -negative_points
+            offset = 0
+
+    def top_k(self, k):
+        return list(self.iter_range(0, k))
+
+    def ranked_columns(self):
+        # Ids and points of the whole leaderboard in order as two lists, without a tuple per student
+        keys = list(chain.from_iterable(self.blocks))
+        return list(map(itemgetter(1), keys)), list(map(neg, map(itemgetter(0), keys)))
+
+    def iter_points_range(self, low, high=None):
+        # Yields (id, points) pairs with low <= points <= high in leaderboard order,
+        # starting at a bisected position so only matching keys are visited
+        start_key = (-high, "") if high is not None else (float("-inf"), "")
+        i = bisect_left(self.maxes, start_key)
+        if i == len(self.blocks):
+            return
+        j = bisect_left(self.blocks[i], start_key)
+        for block in self.blocks[i:]:
+            for negative_points, student_id in block[j:]:
+                if -negative_points < low:
+                    return
+                yield student_id, -negative_points
+            j = 0
+
+    def update_many(self, points_by_id):
+        # Points only go up, so a batch value lower than the stored one is stale: a single update
+        # applied after the batch was collected already holds newer points and is kept.
+        # A batch touching a good part of the leaderboard is cheaper as one sort of the merged points.
+        points_by_id = {student_id: points for student_id, points in points_by_id.items()
+                        if points > self.points.get(student_id, 0)}
+        if len(points_by_id) * 8 < len(self.points):
+            for student_id, points in points_by_id.items():
+                self.update(student_id, points)
+        else:
+            self.points.update(points_by_id)
+            self.rebuild(self.points)
+
+    def rebuild(self, points_by_id):
+        # Replaces the whole leaderboard with one sort instead of one update per student.
+        # Sorting the ids and then stable sorting them by points compares strings and ints, not tuples.
+        self.points = dict(points_by_id)
+        ids = sorted(self.points)
+        ids.sort(key=self.points.__getitem__, reverse=True)
+        self._build_blocks(ids, list(map(self.points.__getitem__, ids)))
+
+    def rebuild_ranked(self, ids, points):
+        # Same as rebuild for ids that are already in leaderboard order, with their points
+        self.points = dict(zip(ids, points))
+        self._build_blocks(ids, points)
+
+    def _build_blocks(self, ids, points):
+        keys = list(zip(map(neg, points), ids))
+        self.blocks = [keys[i:i + self.BLOCK_SIZE] for i in range(0, len(keys), self.BLOCK_SIZE)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self._build_sizes()
+        self.version += 1
+
+
+class StoredLeaderboards(dict):
+    # Course -> Leaderboard of a columnar tracker. After restore_image a course is ranked from the
+    # stored rows and points on first use. Those are the points of the image, so an update that
+    # already reached the columns is applied to the leaderboard afterwards as usual.
+    def __init__(self, students, courses):
+        super().__init__((course, Leaderboard()) for course in courses)
+        self.students = students
+        self.ranked = {}  # Course -> (rows, points) in leaderboard order, not ranked yet
+        self.lock = threading.Lock()
+
+    def __missing__(self, course):
+        with self.lock:
+            if course in self:
+                return dict.__getitem__(self, course)
+            rows, points = self.ranked.pop(course)
+            ids = self.students.field(0)
+            leaderboard = Leaderboard()
+            leaderboard.rebuild_ranked(list(map(ids.__getitem__, rows)), points.tolist())
+            self[course] = leaderboard
+            return leaderboard
+
+    def restore(self, ranked):
+        self.clear()
+        self.ranked = dict(ranked)
+
+
+class CompletionIndex:
+    # Students who completed one course: a bitmap by row for membership tests and the rows
+    # in completion order for listing. Points never decrease, so rows are only ever added.
+    def __init__(self, bitmap=b"", rows=b""):
+        self.bitmap = bytearray(bitmap)
+        self.rows = array('I', rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, row):
+        byte = row >> 3
+        return byte < len(self.bitmap) and bool(self.bitmap[byte] & (1 << (row & 7)))
+
+    def add(self, row):
+        if row in self:
+            return
+        byte = row >> 3
+        if byte >= len(self.bitmap):
+            self.bitmap.extend(bytes(byte + 1 - len(self.bitmap)))
+        self.bitmap[byte] |= 1 << (row & 7)
+        self.rows.append(row)
+
+
+class TrackerSnapshot:
+    # Point-in-time view of a tracker for reports, notification runs and exports, with the read API
+    # of storage.MappedSnapshot. With a columnar store taking one is O(courses): the snapshot shares
+    # the store's columns and the store copies a column before changing it while it is shared,
+    # so add_points keeps writing. A dict-backed tracker has no columns to share, so every student's
+    # counters are copied, which is O(students) and blocks all writers meanwhile. The CLI and the
+    # server therefore run columnar trackers. Students are built per row on access, leaderboards
+    # are ranked on first use.
+    def __init__(self, tracker):
+        self.courses = list(tracker.courses)
+        self.course_completion_requirements = dict(tracker.course_completion_requirements)
+        self.course_index = {course: i for i, course in enumerate(self.courses)}
+        self.totals = (dict(tracker.enrollment_totals), dict(tracker.submission_totals), dict(tracker.point_totals))
+        self.student_count = len(tracker.students)
+        # Rows are only ever appended, so the live registry answers for rows below student_count
+        self.live_students = tracker.students
+        self.registry = tracker
+        self.leaderboards = SnapshotLeaderboards(self)
+        self.student_ids = None
+        self.rows_by_id = None
+
+        store = tracker.course_store
+        if store is None:
+            self.points_columns = self.submissions_columns = None
+            self.students = [Student(student.id, student.first_name, student.last_name, student.email,
+                                     CourseCounts(student.course_points), CourseCounts(student.course_submissions))
+                             for student in tracker.students]
+            self.release = None
+        else:
+            self.points_columns, self.submissions_columns = store.share_columns()
+            self.students = SnapshotStudents(self)
+            self.release = weakref.finalize(self, store.release_columns,
+                                            self.points_columns, self.submissions_columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def student(self, row):
+        live_student = self.live_students[row]
+        return Student(live_student.id, live_student.first_name, live_student.last_name, live_student.email,
+                       FrozenCourseColumnsView(self, self.points_columns, row),
+                       FrozenCourseColumnsView(self, self.submissions_columns, row))
+
+    def find_student_by_id(self, student_id):
+        return self.find_student(self.registry.student_index.get(student_id))
+
+    def find_student_by_email(self, email):
+        return self.find_student(self.registry.email_index.get(email.lower()))
+
+    def find_student(self, row):
+        if row is None or row >= self.student_count:
+            return None
+        return self.students[row]
+
+    def course_totals(self):
+        return self.totals
+
+    def student_fields(self, start, end):
+        # Ids, first names, last names and emails of rows start to end, one list per field
+        if self.points_columns is None:
+            students = self.students[start:end]
+            return ([student.id for student in students], [student.first_name for student in students],
+                    [student.last_name for student in students], [student.email for student in students])
+        return tuple(self.live_students.field(index)[start:end] for index in range(ColumnarStudents.FIELD_COUNT))
+
+    def course_columns(self, start, end):
+        # Points and submissions of rows start to end, one sequence per course for each
+        if self.points_columns is None:
+            students = self.students[start:end]
+            return ([[student.course_points[course] for student in students] for course in self.courses],
+                    [[student.course_submissions[course] for student in students] for course in self.courses])
+        return ([column[start:end] for column in self.points_columns],
+                [column[start:end] for column in self.submissions_columns])
+
+    def points_column(self, course):
+        if self.points_columns is None:
+            return [student.course_points[course] for student in self.students]
+        return self.points_columns[self.course_index[course]]
+
+    def ids(self):
+        if self.student_ids is None:
+            if self.points_columns is None:
+                self.student_ids = [student.id for student in self.students]
+            else:
+                self.student_ids = self.live_students.field(0)[:self.student_count]
+        return self.student_ids
+
+    def ranked_rows(self, points):
+        # The rows are sorted by id once per snapshot and then ranked per course, see rank_rows
+        if self.rows_by_id is None:
+            self.rows_by_id = sorted(range(self.student_count), key=self.ids().__getitem__)
+        return rank_rows(self.rows_by_id, points)
+
+    def close(self):
+        # Lets the store write to the shared columns again instead of copying them.
+        # Also happens when the snapshot is garbage collected.
+        if self.release is not None:
+            self.release()
+
+
+class SnapshotStudents(Sequence):
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.student_count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.snapshot.student(i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("student row out of range")
+        return self.snapshot.student(row)
+
+    def __iter__(self):
+        return map(self.snapshot.student, range(self.snapshot.student_count))
+
+
+class SnapshotLeaderboards(dict):
+    # Course -> SnapshotLeaderboard ranked when first read
+    def __init__(self, snapshot):
+        super().__init__()
+        self.snapshot = snapshot
+
+    def __missing__(self, course):
+        if course not in self.snapshot.course_index:
+            raise KeyError(course)
+        leaderboard = self[course] = SnapshotLeaderboard(self.snapshot, course)
+        return leaderboard
+
+
+class SnapshotLeaderboard:
+    # Same read API as storage.MappedLeaderboard over the ranked rows of a TrackerSnapshot
+    def __init__(self, snapshot, course):
+        self.ids = snapshot.ids()
+        self.points = snapshot.points_column(course)
+        self.rows = snapshot.ranked_rows(self.points)
+        self.version = 0  # A snapshot never changes
+
+    def __len__(self):
+        return len(self.rows)
+
+    def iter_range(self, offset=0, limit=None):
+        end = len(self.rows) if limit is None else min(len(self.rows), offset + limit)
+        for row in self.rows[offset:end]:
+            yield self.ids[row], self.points[row]
+
+    def columns(self, offset, limit):
+        # Ids and points of one page as two lists, without a tuple per learner
+        rows = self.rows[offset:offset + limit]
+        return list(map(self.ids.__getitem__, rows)), list(map(self.points.__getitem__, rows))
+
+    def top_k(self, k):
+        return list(self.iter_range(0, k))
+
+
+class Sha256IdGenerator:
+    # The original scheme: the first 10 hex digits of SHA-256 over the decimal counter
+    def generate_id(self, counter):
+        return LearningProgressTracker.hash_student_id(counter)
+
+
+class PrecomputedSha256IdGenerator:
+    # Same ids as Sha256IdGenerator, hashed a block of counters at a time
+    def __init__(self, block_size=4096):
+        self.block_size = block_size
+        self.block_start = 0
+        self.block = []
+
+    def generate_id(self, counter):
+        position = counter - self.block_start
+        if not 0 <= position < len(self.block):
+            self.block_start = counter
+            self.block = [LearningProgressTracker.hash_student_id(i) for i in range(counter, counter + self.block_size)]
+            position = 0
+        return self.block[position]
+
+
+class Mix64IdGenerator:
+    # splitmix64 finalizer over the counter, a bijection on 64-bit integers, so distinct
+    # counters never collide. Ids are 16 hex digits and not compatible with the SHA-256 ones.
+    MASK = (1 << 64) - 1
+
+    def __init__(self, seed=0):
+        self.seed = seed
+
+    def generate_id(self, counter):
+        z = (self.seed + counter * 0x9E3779B97F4A7C15) & self.MASK
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & self.MASK
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & self.MASK
+        return format(z ^ (z >> 31), "016x")
+
+
+ID_GENERATORS = {"sha256": Sha256IdGenerator,
+                 "precomputed": PrecomputedSha256IdGenerator,
+                 "mix64": Mix64IdGenerator}
+
+
+class LearningProgressTracker:
+    # Number of locks shared by the students' point rows in thread-safe mode
+    POINT_LOCK_STRIPES = 64
+
+    def __init__(self, columnar=False, thread_safe=False, id_generator=None, course_catalog=None):
         self.student_id = 0
-        self.students = []
-        self.courses = ["Python", "DSA", "Databases", "Flask"]
-        self.course_completion_requirements = {
-            "Python": 600,
-            "DSA": 400,
-            "Databases": 480,
-            "Flask": 550
-        }
+        self.id_generator = id_generator or Sha256IdGenerator()
+        course_catalog = course_catalog or DEFAULT_COURSE_CATALOG
+        self.courses = list(course_catalog)
+        self.course_completion_requirements = dict(course_catalog)
+        self.points_pattern, self.points_line_pattern = points_patterns(len(self.courses))
+        self.course_store = ColumnarCourseStore(self.courses) if columnar else None
+        self.students = [] if self.course_store is None else ColumnarStudents(self.course_store)
+        # Registry indexes map an id or an email to the student's row in self.students.
+        # They are rebuilt from the students on first use after restore_image.
+        self._student_index = {}
+        self._email_index = {}
+        # Running per-course aggregates kept up to date by update_student_points
+        self.enrollment_totals = {course: 0 for course in self.courses}
+        self.submission_totals = {course: 0 for course in self.courses}
+        self.point_totals = {course: 0 for course in self.courses}
+        if self.course_store is None:
+            self.leaderboards = {course: Leaderboard() for course in self.courses}
+        else:
+            self.leaderboards = StoredLeaderboards(self.students, self.courses)
+        # Secondary indexes for the query API
+        self.completions = {course: CompletionIndex() for course in self.courses}
+        self._email_domain_index = {}  # Email domain -> rows
+        # (row, course index) pairs of students who reached a course requirement since the last drain
+        self.completion_queue = []
+        # Optional persistent store (see storage.TrackerStore) notified about every change
+        self.store = None
+        # Optional activity.ActivityLog recording every points change with its time
+        self.activity = None
+        # In thread-safe mode the registry lock covers id allocation and the email check together with
+        # the registration, a striped lock covers a student's counters and the aggregates lock covers
+        # the per-course totals, leaderboards and completion queue. A striped lock is always taken before
+        # the aggregates lock. Otherwise they are no-op contexts.
+        if thread_safe:
+            self.registry_lock = threading.RLock()
+            self.point_locks = [threading.Lock() for _ in range(self.POINT_LOCK_STRIPES)]
+            self.aggregates_lock = threading.Lock()
+        else:
+            self.registry_lock = contextlib.nullcontext()
+            self.point_locks = [contextlib.nullcontext()]
+            self.aggregates_lock = contextlib.nullcontext()
+
+    @property
+    def student_index(self):
+        if self._student_index is None:
+            with self.registry_lock:
+                if self._student_index is None:
+                    self._student_index = dict(zip(self.students.field(0), range(len(self.students))))
+        return self._student_index
+
+    @property
+    def email_index(self):
+        if self._email_index is None:
+            with self.registry_lock:
+                if self._email_index is None:
+                    self._email_index = dict(zip(map(str.lower, self.students.field(3)), range(len(self.students))))
+        return self._email_index
+
+    @property
+    def email_domain_index(self):
+        if self._email_domain_index is None:
+            with self.registry_lock:
+                if self._email_domain_index is None:
+                    email_domain_index = {}
+                    for row, email in enumerate(self.students.field(3)):
+                        email_domain_index.setdefault(email.lower().rpartition("@")[2], []).append(row)
+                    self._email_domain_index = email_domain_index
+        return self._email_domain_index
 
     def add_students(self, credentials):
         parsed_credentials = self.parse_credentials(credentials)
@@ -21,16 +832,103 @@ class LearningProgressTracker:
             return
 
         first_name, last_name, email = parsed_credentials
-        if self.validate_student_credentials(first_name, last_name, email):
+        with self.registry_lock:
+            if not self.validate_student_credentials(first_name, last_name, email):
+                return
+            self.register_student(first_name, last_name, email)
+        print("The student has been added.")
+
+    def add_students_bulk(self, credentials_records):
+        # Accepts credential lines or (first name, last name, email) tuples.
+        # Everything is validated first and the accepted students are committed in one pass.
+        with self.registry_lock:
+            return self._add_students_bulk(credentials_records)
+
+    def _add_students_bulk(self, credentials_records):
+        result = BulkResult()
+        accepted_credentials = []
+        batch_emails = set()
+
+        for line_number, credentials in enumerate(credentials_records, start=1):
+            if isinstance(credentials, str):
+                credentials = self.parse_credentials(credentials)
+                if credentials is None:
+                    result.reject(line_number, "Incorrect credentials.")
+                    continue
+            elif (not isinstance(credentials, (tuple, list)) or len(credentials) != 3
+                  or not all(isinstance(field, str) for field in credentials)):
+                result.reject(line_number, "Incorrect credentials.")
+                continue
+
+            first_name, last_name, email = credentials
+            error = self.check_student_credentials(first_name, last_name, email)
+            if error is None and email.lower() in batch_emails:
+                error = "This email is already taken."
+            if error is not None:
+                result.reject(line_number, error)
+                continue
+
+            batch_emails.add(email.lower())
+            accepted_credentials.append(credentials)
+
+        for first_name, last_name, email in accepted_credentials:
+            self.register_student(first_name, last_name, email)
+        result.accepted = len(accepted_credentials)
+        return result
+
+    def register_student(self, first_name, last_name, email):
+        with self.registry_lock:
+            # Truncated ids can collide, a taken id is skipped and the next counter is used
             self.student_id += 1
-            hashed_id = self.hash_student_id(self.student_id)
-            self.students.append({"id": hashed_id,
-                                  "first_name": first_name.title(),
-                                  "last_name": last_name.title(),
-                                  "email": email.lower(),
-                                  "course_points": {course: 0 for course in self.courses},
-                                  "course_submissions": {course: 0 for course in self.courses}})
-            print("The student has been added.")
+            hashed_id = self.id_generator.generate_id(self.student_id)
+            while hashed_id in self.student_index:
+                self.student_id += 1
+                hashed_id = self.id_generator.generate_id(self.student_id)
+            self.append_student(hashed_id, first_name.title(), last_name.title(), email.lower())
+        return hashed_id
+
+    def append_student(self, hashed_id, first_name, last_name, email):
+        # Adds an already validated and normalized student, e.g. one loaded from a store
+        row = len(self.students)
+        self.student_index[hashed_id] = row
+        self.email_index[email.lower()] = row
+        self.email_domain_index.setdefault(email.lower().rpartition("@")[2], []).append(row)
+        if self.course_store is None:
+            self.students.append(Student(hashed_id, first_name, last_name, email,
+                                         CourseCounts.fromkeys(self.courses, 0),
+                                         CourseCounts.fromkeys(self.courses, 0)))
+        else:
+            self.course_store.add_row()
+            self.students.append(hashed_id, first_name, last_name, email)
+        if self.store is not None:
+            self.store.student_added(row)
+        return row
+
+    def append_students(self, records):
+        # Bulk append_student for (id, first name, last name, email) records, returns the first new row
+        start = len(self.students)
+        records = list(records)
+        if not records:
+            return start
+        ids, first_names, last_names, emails = zip(*records)
+        rows = range(start, start + len(records))
+        lowered_emails = list(map(str.lower, emails))
+        self.student_index.update(zip(ids, rows))
+        self.email_index.update(zip(lowered_emails, rows))
+        for row, email in zip(rows, lowered_emails):
+            self.email_domain_index.setdefault(email.rpartition("@")[2], []).append(row)
+        if self.course_store is None:
+            self.students.extend(Student(student_id, first_name, last_name, email,
+                                         CourseCounts.fromkeys(self.courses, 0),
+                                         CourseCounts.fromkeys(self.courses, 0))
+                                 for student_id, first_name, last_name, email in records)
+        else:
+            self.course_store.add_rows(len(records))
+            self.students.extend(ids, first_names, last_names, emails)
+        if self.store is not None:
+            for row in rows:
+                self.store.student_added(row)
+        return start
 
     @staticmethod
     def hash_student_id(student_id):
@@ -50,78 +948,360 @@ class LearningProgressTracker:
         return first_name, last_name, email
 
     def validate_student_credentials(self, first_name, last_name, email):
-        if not self.validate_name(first_name):
-            print("Incorrect first name.")
+        error = self.check_student_credentials(first_name, last_name, email)
+        if error is not None:
+            print(error)
             return False
 
+        return True
+
+    def check_student_credentials(self, first_name, last_name, email):
+        if not self.validate_name(first_name):
+            return "Incorrect first name."
+
         if not self.validate_name(last_name):
-            print("Incorrect last name.")
-            return False
+            return "Incorrect last name."
 
         if not self.validate_email(email):
-            print("Incorrect email.")
-            return False
+            return "Incorrect email."
 
-        if not self.is_email_unique(email):
-            print("This email is already taken.")
-            return False
+        if not self.is_email_unique(email.lower()):
+            return "This email is already taken."
 
-        return True
+        return None
 
     @staticmethod
     def validate_name(name):
-        # Requirements:
-        # - Only ASCII characters, hyphens and apostrophes
-        # - Hyphens and apostrophes cannot be the first or the last characters
-        # - Hyphens and apostrophes cannot be adjacent to each other
-        # - Must be at least two characters long
-        name_pattern = r'^[a-z](?!.*[-\']{2})[a-z\' -]*[a-z]$'
-        return re.match(name_pattern, name, re.IGNORECASE)
+        return NAME_PATTERN.match(name)
 
     @staticmethod
     def validate_email(email):
-        # Should contain name, the @ symbol, and domain
-        email_pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
-        return re.match(email_pattern, email)
+        return EMAIL_PATTERN.match(email)
 
     def is_email_unique(self, email):
-        for student in self.students:
-            student_email = student["email"]
-            if student_email == email:
-                return False
-
-        return True
+        return email not in self.email_index
 
     def list_students(self):
         if not self.students:
             print("No students found.")
         else:
             print("Students:")
-            for student in self.students:
-                print(student["id"])
+            for student in self.iter_students():
+                print(student.id)
+
+    def iter_students(self, offset=0):
+        return islice(self.students, offset, None)
 
     def add_points(self, points):
-        if not self.validate_points(points):
+        record = self.parse_points_line(points)
+        if record is None:
             print("Incorrect points format.")
             return
 
-        student_id, points_to_add = self.parse_points(points)
-        student = self.find_student_by_id(student_id)
+        student = self.find_student_by_id(record.student_id)
         if student is None:
             return
 
-        course_points = student["course_points"]
-        submissions = student["course_submissions"]
-        for course, pts in zip(self.courses, points_to_add):
-            if pts > 0:
-                course_points[course] += pts
-                submissions[course] += 1
+        submissions_to_add = [1 if pts > 0 else 0 for pts in record.points]
+        self.update_student_points(student, record.points, submissions_to_add)
         print("Points updated.")
 
+    def add_points_bulk(self, points_records):
+        # Accepts point lines or (id, points...) tuples.
+        # Deltas are summed per student so every student is updated once.
+        result = BulkResult()
+        deltas = {}
+        course_count = len(self.courses)
+
+        for line_number, record in enumerate(points_records, start=1):
+            if isinstance(record, str):
+                record = self.parse_points_line(record)
+                if record is None:
+                    result.reject(line_number, "Incorrect points format.")
+                    continue
+                student_id, points_to_add = record
+            else:
+                # bool is an int subclass, so the exact type is checked
+                if (not isinstance(record, (tuple, list)) or len(record) != course_count + 1
+                        or not isinstance(record[0], str)
+                        or not all(type(pts) is int and pts >= 0 for pts in record[1:])):
+                    result.reject(line_number, "Incorrect points format.")
+                    continue
+                student_id, *points_to_add = record
+
+            row = self.student_index.get(student_id)
+            if row is None:
+                result.reject(line_number, f"No student is found for id={student_id}.")
+                continue
+
+            if row not in deltas:
+                deltas[row] = ([0] * course_count, [0] * course_count)
+            points_delta, submissions_delta = deltas[row]
+            for i, pts in enumerate(points_to_add):
+                if pts > 0:
+                    points_delta[i] += pts
+                    submissions_delta[i] += 1
+            result.accepted += 1
+
+        self.apply_point_deltas(deltas)
+        return result
+
+    def add_points_sharded(self, points_lines, processes=None, chunk_size=100_000):
+        # Lines are partitioned by student id hash and parsed, validated and summed per student
+        # in a process pool; only the reduced per-student deltas come back to be applied here.
+        # The resulting points and submissions are the same as applying the lines with add_points.
+        result = BulkResult()
+        deltas = {}
+        processes = processes or os.cpu_count() or 1
+
+        with multiprocessing.Pool(processes, initializer=init_points_shard_worker,
+                                  initargs=(set(self.student_index), len(self.courses))) as pool:
+            shards = partition_points_lines(points_lines, processes, chunk_size)
+            for shard_deltas, accepted, rejected in pool.imap_unordered(aggregate_points_shard, shards):
+                result.accepted += accepted
+                result.rejected.extend(rejected)
+                for student_id, (points_delta, submissions_delta) in shard_deltas.items():
+                    row = self.student_index[student_id]
+                    if row in deltas:
+                        total_points, total_submissions = deltas[row]
+                        for i in range(len(points_delta)):
+                            total_points[i] += points_delta[i]
+                            total_submissions[i] += submissions_delta[i]
+                    else:
+                        deltas[row] = (points_delta, submissions_delta)
+
+        result.rejected.sort()
+        self.apply_point_deltas(deltas)
+        return result
+
+    def apply_point_deltas(self, deltas):
+        # Applies summed {row: (points, submissions)} deltas, updating each leaderboard once per batch
+        changed_points = {course: {} for course in self.courses}
+        for row, (points_delta, submissions_delta) in deltas.items():
+            self.update_student_points(self.students[row], points_delta, submissions_delta, changed_points)
+        with self.aggregates_lock:
+            for course, points_by_id in changed_points.items():
+                if points_by_id:
+                    self.leaderboards[course].update_many(points_by_id)
+
+    def update_student_points(self, student, points_to_add, submissions_to_add, changed_points=None):
+        # With changed_points the new points are collected per course instead of updating the leaderboards
+        row = self.student_index[student.id]
+        course_points = student.course_points
+        submissions = student.course_submissions
+        changes = []
+        # The row stays locked until the aggregates are updated, so a snapshot never sees half an update
+        with self.point_locks[row % len(self.point_locks)]:
+            for course_index, (course, pts, subs) in enumerate(zip(self.courses, points_to_add, submissions_to_add)):
+                if pts > 0:
+                    old_points = course_points[course]
+                    course_points[course] = old_points + pts
+                    submissions[course] += subs
+                    changes.append((course_index, course, pts, subs, old_points))
+
+            with self.aggregates_lock:
+                # Bulk updates arrive here already summed, so they are logged as one event per student and course
+                timestamp = self.activity.clock() if self.activity is not None else None
+                for course_index, course, pts, subs, old_points in changes:
+                    if timestamp is not None:
+                        self.activity.record(timestamp, row, course_index, pts, subs)
+                    new_points = old_points + pts
+                    if old_points == 0:
+                        self.enrollment_totals[course] += 1
+                    self.point_totals[course] += pts
+                    self.submission_totals[course] += subs
+                    if changed_points is None:
+                        self.leaderboards[course].update(student.id, new_points)
+                    else:
+                        changed_points[course][student.id] = new_points
+                    if old_points < self.course_completion_requirements[course] <= new_points:
+                        self.completion_queue.append((row, course_index))
+                        self.completions[course].add(row)
+                if self.store is not None:
+                    self.store.points_updated(row)
+
+    def add_course(self, course, requirement):
+        # Students keep their data, a new course reads as 0 for all of them until points are added
+        if any(course.lower() == name.lower() for name in self.courses):
+            raise ValueError(f"Course {course} already exists")
+        with self.registry_lock, self.aggregates_lock:
+            if self.course_store is not None:
+                self.course_store.add_course(course)
+            self.courses.append(course)
+            self.course_completion_requirements[course] = requirement
+            self.enrollment_totals[course] = 0
+            self.submission_totals[course] = 0
+            self.point_totals[course] = 0
+            self.leaderboards[course] = Leaderboard()
+            self.completions[course] = CompletionIndex()
+            self.points_pattern, self.points_line_pattern = points_patterns(len(self.courses))
+
+    def take_snapshot(self):
+        # Consistent read view, see TrackerSnapshot. In thread-safe mode every lock is taken for the
+        # duration of the setup, i.e. in-flight updates finish first. The setup is O(courses) with a
+        # columnar store and an O(students) copy without one.
+        with self.hold_all_locks():
+            return TrackerSnapshot(self)
+
+    @contextlib.contextmanager
+    def hold_all_locks(self):
+        with contextlib.ExitStack() as locks:
+            locks.enter_context(self.registry_lock)
+            for lock in self.point_locks:
+                locks.enter_context(lock)
+            locks.enter_context(self.aggregates_lock)
+            yield
+
+    def image(self):
+        # Whole-column state of a columnar tracker for storage.TrackerStore, taken under hold_all_locks.
+        # Fields and leaderboards restored from an image and not read since are handed back as stored.
+        students = self.students
+        ranked = []
+        rows_by_id = None
+        for course, column in zip(self.courses, self.course_store.points_columns):
+            stored = self.leaderboards.ranked.get(course)
+            if stored is not None:
+                rows, points = stored
+            else:
+                ids, points = self.leaderboards[course].ranked_columns()
+                rows = array('I', map(self.student_index.__getitem__, ids))
+                points = array('q', points)
+            if len(rows) != len(column) - column.count(0) or array('q', map(column.__getitem__, rows)) != points:
+                # A batch has reached the columns but not the leaderboard yet, the column itself is ranked
+                if rows_by_id is None:
+                    ids = students.field(0)
+                    rows_by_id = sorted(range(len(ids)), key=ids.__getitem__)
+                rows = rank_rows(rows_by_id, column)
+                points = array('q', map(column.__getitem__, rows))
+            ranked.append((rows, points))
+        return TrackerImage(courses=list(self.courses),
+                            requirements=dict(self.course_completion_requirements),
+                            student_count=len(students),
+                            fields=[students.encoded_field(index) for index in range(students.FIELD_COUNT)],
+                            points=[column.tobytes() for column in self.course_store.points_columns],
+                            submissions=[column.tobytes() for column in self.course_store.submissions_columns],
+                            ranked=[(rows.tobytes(), points.tobytes()) for rows, points in ranked],
+                            completions=[(bytes(self.completions[course].bitmap), self.completions[course].rows.tobytes())
+                                         for course in self.courses],
+                            completion_queue=array('I', chain.from_iterable(self.completion_queue)).tobytes(),
+                            totals=[self.enrollment_totals, self.submission_totals, self.point_totals])
+
+    def restore_image(self, image):
+        # Loads an image of a tracker with the same courses into this empty columnar tracker. Only the
+        # columns are filled here; students, registry indexes and leaderboards are built on first use.
+        self.course_store.restore_columns(image.student_count, image.points, image.submissions)
+        self.students.restore(image.student_count, image.fields)
+        self._student_index = self._email_index = self._email_domain_index = None
+        self.leaderboards.restore((course, (array('I', rows), array('q', points)))
+                                  for course, (rows, points) in zip(self.courses, image.ranked))
+        self.completions = {course: CompletionIndex(bitmap, rows)
+                            for course, (bitmap, rows) in zip(self.courses, image.completions)}
+        queue = array('I', image.completion_queue)
+        self.completion_queue = list(zip(queue[::2], queue[1::2]))
+        self.enrollment_totals, self.submission_totals, self.point_totals = (dict(totals) for totals in image.totals)
+
+    def export(self, directory, file_format):
+        # Streams students, leaderboards and statistics from a snapshot, see export.export_snapshot
+        with self.take_snapshot() as snapshot:
+            statistics = Statistics(snapshot.courses, snapshot.course_completion_requirements)
+            return export_snapshot(snapshot, statistics, directory, file_format)
+
+    def drain_completions(self):
+        # Returns (student, course) pairs in the same order a scan over all students would find them
+        with self.aggregates_lock:
+            completions = sorted(self.completion_queue)
+            self.completion_queue = []
+        return [(self.students[row], self.courses[course_index]) for row, course_index in completions]
+
+    def save_binary_snapshot(self, path):
+        write_binary_snapshot(self, path)
+
     @staticmethod
-    def validate_points(points):
-        points_pattern = r'^\w+( \d+){4}$'
-        return re.match(points_pattern, points)
+    def open_binary_snapshot(path):
+        # Read-only, memory-mapped view serving find, statistics and top-learner queries
+        return MappedSnapshot(path)
+
+    def rebuild_course_indexes(self):
+        # Recomputes running totals and leaderboards after points were set directly
+        self.enrollment_totals, self.submission_totals, self.point_totals = self.calculate_course_totals()
+        if self.course_store is not None:
+            # Whole columns are scanned per course, no per-student views are built, see rank_rows
+            ids = self.students.field(0)
+            rows_by_id = sorted(range(len(ids)), key=ids.__getitem__)
+            completion_queue = []
+            for course_index, (course, column) in enumerate(zip(self.courses, self.course_store.points_columns)):
+                rows = rank_rows(rows_by_id, column)
+                self.leaderboards[course].rebuild_ranked(list(map(ids.__getitem__, rows)),
+                                                         list(map(column.__getitem__, rows)))
+                requirement = self.course_completion_requirements[course]
+                completion_queue.extend((row, course_index) for row, points in enumerate(column)
+                                        if points >= requirement)
+            self.completion_queue = sorted(completion_queue)
+        else:
+            for course in self.courses:
+                self.leaderboards[course].rebuild(
+                    (student.id, student.course_points[course]) for student in self.students
+                    if student.course_points[course] > 0)
+            self.completion_queue = [(row, course_index)
+                                     for row, student in enumerate(self.students)
+                                     for course_index, course in enumerate(self.courses)
+                                     if student.course_points[course] >= self.course_completion_requirements[course]]
+        self.completions = {course: CompletionIndex() for course in self.courses}
+        for row, course_index in self.completion_queue:
+            self.completions[self.courses[course_index]].add(row)
+
+    def has_completed(self, student_id, course):
+        row = self.student_index.get(student_id)
+        return row is not None and row in self.completions[course]
+
+    def query_completed(self, course):
+        # Students who completed the course, in registration order
+        return [self.students[row] for row in sorted(self.completions[course].rows)]
+
+    def query_points_range(self, course, low, high=None):
+        # (id, points) of the students with low <= points <= high, in leaderboard order.
+        # Only students with points in the course are indexed, so low should be at least 1.
+        return list(self.leaderboards[course].iter_points_range(max(low, 1), high))
+
+    def query_completion_range(self, course, low_percent, high_percent=None):
+        # Same as query_points_range with bounds in percent of the course requirement.
+        # The upper bound is open from 100% on, as completion is shown as 100% above the requirement.
+        requirement = self.course_completion_requirements[course]
+        low = math.ceil(Fraction(low_percent) * requirement / 100)
+        if high_percent is None or Fraction(high_percent) >= 100:
+            high = None
+        else:
+            high = math.floor(Fraction(high_percent) * requirement / 100)
+        return self.query_points_range(course, low, high)
+
+    def query_email_domain(self, domain):
+        return [self.students[row] for row in self.email_domain_index.get(domain.lower().lstrip("@"), [])]
+
+    def top_k(self, course, k):
+        return self.leaderboards[course].top_k(k)
+
+    def course_learners_page(self, course, offset, limit):
+        return list(self.leaderboards[course].iter_range(offset, limit))
+
+    def course_rank(self, course, student_id):
+        return self.leaderboards[course].rank(student_id)
+
+    def calculate_course_totals(self):
+        # Full recomputation, used to check the running aggregates
+        if self.course_store is not None:
+            return self.course_store.column_totals()
+        statistics = Statistics(self.courses, self.course_completion_requirements)
+        return statistics.calculate_course_totals(self.students)
+
+    def verify_course_totals(self):
+        running_totals = (self.enrollment_totals, self.submission_totals, self.point_totals)
+        return self.calculate_course_totals() == running_totals
+
+    def validate_points(self, points):
+        return self.points_pattern.match(points)
+
+    def parse_points_line(self, points):
+        return match_points_line(self.points_line_pattern, points)
 
     @staticmethod
     def parse_points(points):
@@ -135,19 +1315,77 @@ class LearningProgressTracker:
         if student is None:
             return
 
-        course_points = student["course_points"]
-        print(f"{student_id} points: Python={course_points['Python']}; DSA={course_points['DSA']}; Databases={course_points['Databases']}; Flask={course_points['Flask']}.")
+        course_points = student.course_points
+        print(f"{student_id} points: " + "; ".join(f"{course}={course_points[course]}" for course in self.courses) + ".")
 
     def find_student_by_id(self, student_id):
-        for student in self.students:
-            if student["id"] == student_id:
-                return student
+        row = self.student_index.get(student_id)
+        if row is not None:
+            return self.students[row]
 
         print(f"No student is found for id={student_id}.")
         return None
 
 
+# Student ids known to a sharded ingestion worker process, set by init_points_shard_worker
+worker_student_ids = None
+worker_course_count = None
+worker_points_line_pattern = None
+
+
+def init_points_shard_worker(student_ids, course_count):
+    global worker_student_ids, worker_course_count, worker_points_line_pattern
+    worker_student_ids = student_ids
+    worker_course_count = course_count
+    worker_points_line_pattern = points_patterns(course_count)[1]
+
+
+def partition_points_lines(points_lines, shard_count, chunk_size):
+    # Yields chunks of (line number, line) pairs; all lines of a student id go to the same shard
+    shards = [[] for _ in range(shard_count)]
+    for line_number, line in enumerate(points_lines, start=1):
+        shard_index = hash(line.split(" ", 1)[0]) % shard_count
+        shard = shards[shard_index]
+        shard.append((line_number, line))
+        if len(shard) >= chunk_size:
+            yield shard
+            shards[shard_index] = []
+    for shard in shards:
+        if shard:
+            yield shard
+
+
+def aggregate_points_shard(numbered_lines):
+    # Runs in a worker process and returns ({id: (points, submissions)}, accepted count, rejections)
+    deltas = {}
+    accepted = 0
+    rejected = []
+    for line_number, line in numbered_lines:
+        record = match_points_line(worker_points_line_pattern, line)
+        if record is None:
+            rejected.append((line_number, "Incorrect points format."))
+            continue
+        if record.student_id not in worker_student_ids:
+            rejected.append((line_number, f"No student is found for id={record.student_id}."))
+            continue
+
+        if record.student_id not in deltas:
+            deltas[record.student_id] = ([0] * worker_course_count, [0] * worker_course_count)
+        points_delta, submissions_delta = deltas[record.student_id]
+        for i, pts in enumerate(record.points):
+            if pts > 0:
+                points_delta[i] += pts
+                submissions_delta[i] += 1
+        accepted += 1
+    return deltas, accepted, rejected
+
+
 class Statistics:
+    LEARNERS_HEADER = "{:<12} {:<10} {:9}".format("id", "points", "completed")
+    # Rendered learner rows kept per course. Once full no more pages are added,
+    # so the top of the leaderboard, which is viewed most, stays cached.
+    PAGE_CACHE_ROWS = 200_000
+
     def __init__(self, courses, course_completion_requirements):
         self.courses = courses
         self.course_completion_requirements = course_completion_requirements
@@ -159,12 +1397,39 @@ class Statistics:
             "EC": "n/a",  # Easiest Course
             "HC": "n/a"  # Hardest Course
         }
+        # Course -> (leaderboard, its version, {(offset, limit): rendered page}, cached rows)
+        self.page_cache = {}
 
     def calculate_course_statistics(self, students):
+        self.update_statistics_from_totals(*self.calculate_course_totals(students))
+
+    def calculate_course_statistics_from_store(self, store):
+        if np is None:
+            self.update_statistics_from_totals(*store.column_totals())
+        else:
+            self.calculate_course_statistics_from_columns(store.points_columns, store.submissions_columns)
+
+    def calculate_course_statistics_from_columns(self, points_columns, submissions_columns):
+        # NumPy engine over one int64 buffer per course (ColumnarCourseStore or snapshot columns).
+        # Produces the same statistics as update_statistics_from_totals.
+        points = [np.frombuffer(column, dtype=np.int64) for column in points_columns]
+        submissions = [np.frombuffer(column, dtype=np.int64) for column in submissions_columns]
+        course_enrollment = np.array([np.count_nonzero(column) for column in points])
+        course_submissions = np.array([int(column.sum()) for column in submissions])
+        course_points = np.array([int(column.sum()) for column in points])
+
+        if not course_enrollment.any():
+            return
+        average_course_points = np.zeros(len(self.courses))
+        np.divide(course_points, course_submissions, out=average_course_points, where=course_submissions > 0)
+        self.update_course_statistics_from_array(course_enrollment, "MP", "LP")
+        self.update_course_statistics_from_array(course_submissions, "HA", "LA")
+        self.update_course_statistics_from_array(average_course_points, "EC", "HC")
+
+    def calculate_course_totals(self, students):
         course_enrollment = {course: 0 for course in self.courses}
         course_submissions = {course: 0 for course in self.courses}
         course_points = {course: 0 for course in self.courses}
-        average_course_points = {course: 0.0 for course in self.courses}
 
         for student in students:
             for course, points in student["course_points"].items():
@@ -175,6 +1440,10 @@ class Statistics:
             for course, submissions in student["course_submissions"].items():
                 course_submissions[course] += submissions
 
+        return course_enrollment, course_submissions, course_points
+
+    def update_statistics_from_totals(self, course_enrollment, course_submissions, course_points):
+        average_course_points = {course: 0.0 for course in self.courses}
         for course in self.courses:
             if course_submissions[course] > 0:
                 average_course_points[course] = course_points[course] / course_submissions[course]
@@ -203,30 +1472,72 @@ class Statistics:
             low_stat_course_list = [course for course, value in dictionary.items() if value == min_value]
             self.statistics[low_stat] = ", ".join(low_stat_course_list)
 
+    def update_course_statistics_from_array(self, values, high_stat, low_stat):
+        max_value = values.max()
+        min_value = values.min()
+        self.statistics[high_stat] = ", ".join(self.courses[i] for i in np.flatnonzero(values == max_value))
+        if max_value != min_value:
+            self.statistics[low_stat] = ", ".join(self.courses[i] for i in np.flatnonzero(values == min_value))
+
     def get_statistics(self):
         return self.statistics
 
     def show_course_top_learners(self, course, students):
-        course = course.upper() if course == "dsa" else course.capitalize()
-
-        print(course)
-        print("{:<12} {:<10} {:9}".format("id", "points", "completed"))
+        course = self.course_display_name(course)
 
         student_course_info = []
         for student in students:
             course_points = student["course_points"][course]
             if course_points > 0:
-                student_course_info.append({"id": student["id"],
-                                            "points": course_points,
-                                            "course_completion": self.calculate_course_completion(course, course_points)})
+                student_course_info.append((student["id"], course_points))
 
         # Sort by points in descending order
         # and by ID in ascending order for the same number of points
-        student_course_info.sort(key=lambda d: d["id"])
-        student_course_info.sort(key=lambda d: d["points"], reverse=True)
+        student_course_info.sort(key=lambda info: info[0])
+        student_course_info.sort(key=lambda info: info[1], reverse=True)
+
+        self.print_course_learners(course, student_course_info)
+
+    def iter_course_learners(self, course, leaderboards, offset=0):
+        # Yields (id, points, completion) rows lazily, one leaderboard block at a time
+        course = self.course_display_name(course)
+        for student_id, points in leaderboards[course].iter_range(offset):
+            yield student_id, points, self.calculate_course_completion(course, points)
+
+    def render_course_learners_page(self, course, leaderboards, offset, limit):
+        # Rendered rows of one leaderboard page. Pages are reused until that course's leaderboard
+        # changes, so completion percentages are only computed for pages that are actually shown.
+        course_name = self.course_display_name(course)
+        leaderboard = leaderboards[course_name]
+        cached_leaderboard, version, pages, rows = self.page_cache.get(course_name, (None, None, None, 0))
+        if cached_leaderboard is not leaderboard or version != leaderboard.version:
+            pages, rows = {}, 0
+
+        page = pages.get((offset, limit))
+        if page is None:
+            learners = list(islice(self.iter_course_learners(course, leaderboards, offset), limit))
+            page = "".join(self.format_course_learner(*learner) + "\n" for learner in learners)
+            if rows + len(learners) <= self.PAGE_CACHE_ROWS:
+                pages[(offset, limit)] = page
+                rows += len(learners)
+            self.page_cache[course_name] = (leaderboard, leaderboard.version, pages, rows)
+        return page
+
+    def print_course_learners(self, course, learners):
+        print(course)
+        print(self.LEARNERS_HEADER)
+
+        for student_id, points in learners:
+            print(self.format_course_learner(student_id, points, self.calculate_course_completion(course, points)))
 
-        for student in student_course_info:
-            print("{:<12} {:<10} {:3}%".format(student["id"], student["points"], student["course_completion"]))
+    @staticmethod
+    def format_course_learner(student_id, points, completion):
+        return "{:<12} {:<10} {:3}%".format(student_id, points, completion)
+
+    def course_display_name(self, course):
+        # Catalog spelling of a course typed in any case
+        course = course.lower()
+        return next((name for name in self.courses if name.lower() == course), course)
 
     def calculate_course_completion(self, course, points):
         completion_percentage = round(points / self.course_completion_requirements[course] * 100, 1)
@@ -237,87 +1548,296 @@ class Statistics:
         return completion_percentage
 
 
+class FileSender:
+    # Notification sink appending messages to a file, a stand-in for a real mail server.
+    # Any object with an async send_batch(messages) method can be used instead.
+    def __init__(self, path):
+        self.path = path
+
+    async def send_batch(self, messages):
+        await asyncio.to_thread(self.write_batch, messages)
+
+    def write_batch(self, messages):
+        with open(self.path, "a") as file:
+            file.write("".join(Notification.format_notification(*message) + "\n" for message in messages))
+
+
 class Notification:
-    def __init__(self, courses, course_completion_requirements):
+    def __init__(self, courses, course_completion_requirements, sender=None,
+                 delivery_batch_size=100, max_concurrent_batches=4):
         self.courses = courses
         self.course_completion_requirements = course_completion_requirements
-        self.notified_students = {course: [] for course in self.courses}
+        self.notified_students = {course: set() for course in self.courses}
+        self.store = None
+        # Without a sender notifications are printed, otherwise they are delivered asynchronously in batches
+        self.sender = sender
+        self.delivery_batch_size = delivery_batch_size
+        self.max_concurrent_batches = max_concurrent_batches
 
     def notify_students(self, students):
+        # Full scan over every student
+        completions = [(student, course)
+                       for student in students
+                       for course, points in student["course_points"].items()
+                       if points >= self.course_completion_requirements[course]]
+        self.notify_completions(completions)
+
+    def notify_completions(self, completions):
+        # Only looks at the given (student, course) pairs, e.g. from LearningProgressTracker.drain_completions
+        messages, notified_count = self.collect_notifications(completions)
+        self.send_notifications(messages)
+        print(f"Total {notified_count} students have been notified.")
+
+    def collect_notifications(self, completions):
+        messages = []
         students_to_notify = set()
 
-        for student in students:
-            email = student['email']
-            full_name = f"{student['first_name']} {student['last_name']}"
-
-            for course, points in student["course_points"].items():
-                if (points >= self.course_completion_requirements[course]
-                        and student["id"] not in self.notified_students[course]):
-                    self.send_notification(email, full_name, course)
-                    # Track how many unique students are being notified in the current method call
-                    students_to_notify.add(student["id"])
-                    # Track which students should not be notified again for the same course in the future
-                    self.notified_students[course].append(student["id"])
-
-        print(f"Total {len(students_to_notify)} students have been notified.")
+        for student, course in completions:
+            if student["id"] not in self.notified_students.setdefault(course, set()):
+                if isinstance(student, StudentRecord):
+                    full_name = student.full_name
+                else:
+                    full_name = f"{student['first_name']} {student['last_name']}"
+                messages.append((student["email"], full_name, course))
+                # Track how many unique students are being notified in the current method call
+                students_to_notify.add(student["id"])
+                # Track which students should not be notified again for the same course in the future
+                self.notified_students[course].add(student["id"])
+                if self.store is not None:
+                    self.store.student_notified(course, student["id"])
+
+        return messages, len(students_to_notify)
+
+    def send_notifications(self, messages):
+        if self.sender is None:
+            for message in messages:
+                self.send_notification(*message)
+        elif messages:
+            asyncio.run(self.deliver(messages))
+
+    async def deliver(self, messages):
+        semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+
+        async def send_batch(batch):
+            async with semaphore:
+                await self.sender.send_batch(batch)
+
+        batch_size = self.delivery_batch_size
+        await asyncio.gather(*(send_batch(messages[i:i + batch_size]) for i in range(0, len(messages), batch_size)))
 
     @staticmethod
     def send_notification(email, full_name, course):
-        print(f"To: {email}\n"
-              f"Re: Your Learning Progress\n"
-              f"Hello, {full_name}! You have accomplished our {course} course!")
+        print(Notification.format_notification(email, full_name, course))
+
+    @staticmethod
+    def format_notification(email, full_name, course):
+        return (f"To: {email}\n"
+                f"Re: Your Learning Progress\n"
+                f"Hello, {full_name}! You have accomplished our {course} course!")
 
 
 class UserMenu:
-    def __init__(self, tracker):
+    # Rows written per stdout call when output is not paginated
+    OUTPUT_CHUNK_SIZE = 1000
+    # Buffer size for script input and output
+    SCRIPT_BUFFER_SIZE = 1 << 20
+
+    def __init__(self, tracker, page_size=None):
         self.tracker = tracker
+        # None prints every row, otherwise the user is asked before each further page
+        self.page_size = page_size
         self.statistics = Statistics(tracker.courses, tracker.course_completion_requirements)
         self.notifications = Notification(tracker.courses, tracker.course_completion_requirements)
-
-    @staticmethod
-    def greet_user():
-        print("Learning Progress Tracker")
+        # Script mode reads from input_lines instead of input() and doesn't print prompts
+        self.input_lines = None
+        self.show_prompts = True
+        # Lines read by the current command, collected for JSON lines output
+        self.consumed_lines = None
+        # Optional metrics.Metrics, see enable_metrics
+        self.metrics = None
+
+    def enable_metrics(self, metrics):
+        # Times every command and the tracker, statistics and notification hot paths
+        self.metrics = metrics
+        metrics.instrument(self.tracker, "add_students")
+        metrics.instrument(self.tracker, "add_points")
+        metrics.instrument(self.tracker, "find_student_by_id")
+        metrics.instrument(self.statistics, "update_statistics_from_totals")
+        metrics.instrument(self.statistics, "render_course_learners_page", result_rows=lambda page: page.count("\n"))
+        metrics.instrument(self.notifications, "notify_completions", lambda completions: len(completions))
+
+    def prompt(self, message):
+        if self.show_prompts:
+            print(message)
+
+    def read_line(self):
+        if self.input_lines is None:
+            return input()
+
+        line = next(self.input_lines, None)
+        if line is None:
+            raise EOFError
+        line = line.rstrip("\n")
+        if self.consumed_lines is not None:
+            self.consumed_lines.append(line)
+        return line
+
+    def greet_user(self):
+        self.prompt("Learning Progress Tracker")
 
     @staticmethod
     def exit_command():
         print("Bye!")
 
     def add_students_command(self):
-        print("Enter student credentials or 'back' to return:")
+        self.prompt("Enter student credentials or 'back' to return:")
         while True:
-            credentials = input().lower().strip()
+            credentials = self.read_line().lower().strip()
             if credentials == "back":
                 print(f"Total {len(self.tracker.students)} students have been added.")
                 break
             else:
                 self.tracker.add_students(credentials)
 
-    def list_students_command(self):
-        self.tracker.list_students()
+    def list_students_command(self, offset=0):
+        if not self.tracker.students:
+            print("No students found.")
+        else:
+            print("Students:")
+            self.write_rows(student.id for student in self.tracker.iter_students(offset))
+
+    def write_rows(self, rows):
+        # Writes a whole page with a single stdout call, keeping at most one page in memory
+        page_size = self.page_size or self.OUTPUT_CHUNK_SIZE
+        rows = iter(rows)
+        pages = iter(lambda: "".join(row + "\n" for row in islice(rows, page_size)), "")
+        self.write_pages(pages)
+
+    def write_pages(self, pages):
+        # Pages are rendered text; with a page size set the user is asked before every next page.
+        # Scripts are never asked, so their next lines are always read as commands.
+        page = next(pages, "")
+        while page:
+            sys.stdout.write(page)
+            page = next(pages, "")
+            if page and self.page_size is not None and self.show_prompts:
+                self.prompt("Enter 'next' to see more or 'back' to return:")
+                if self.read_line().lower().strip() != "next":
+                    break
 
     def add_points_command(self):
-        print("Enter an id and points or 'back' to return:")
+        self.prompt("Enter an id and points or 'back' to return:")
         while True:
-            points = input()
+            points = self.read_line()
             if points == "back":
                 break
             else:
                 self.tracker.add_points(points)
 
     def find_student_command(self):
-        print("Enter an id or 'back' to return:")
+        self.prompt("Enter an id or 'back' to return:")
         while True:
-            student_id = input()
+            student_id = self.read_line()
             if student_id == "back":
                 break
             else:
                 self.tracker.print_student_points(student_id)
 
+    def activity_command(self):
+        activity = self.tracker.activity
+        if activity is None:
+            print("Activity is not recorded.")
+            return
+
+        self.prompt("Enter the number of days or 'back' to return:")
+        while True:
+            days = self.read_line().strip()
+            if days == "back":
+                break
+            elif not days.isdigit() or int(days) == 0:
+                print("Incorrect number of days.")
+            else:
+                print(f"Activity in the last {int(days)} days:")
+                print("{:<12} {:<10} {:<10} {}".format("course", "events", "points", "submissions"))
+                for course, (events, points, submissions) in activity.window_totals(int(days)).items():
+                    print("{:<12} {:<10} {:<10} {}".format(course, events, points, submissions))
+
+    def query_command(self):
+        # Queries: completed <course>, points <course> <min> <max>, percent <course> <min> <max>, domain <domain>
+        self.prompt("Enter a query or 'back' to return:")
+        while True:
+            query = self.read_line().strip()
+            if query == "back":
+                break
+            elif not self.run_query(query.split()):
+                print("Incorrect query.")
+
+    def run_query(self, parts):
+        # Returns False when the query is malformed
+        courses = {course.lower(): course for course in self.tracker.courses}
+        if len(parts) == 2 and parts[0] == "domain":
+            students = self.tracker.query_email_domain(parts[1])
+            self.print_query_rows(student.id for student in students)
+        elif len(parts) == 2 and parts[0] == "completed" and parts[1].lower() in courses:
+            students = self.tracker.query_completed(courses[parts[1].lower()])
+            self.print_query_rows(student.id for student in students)
+        elif len(parts) == 4 and parts[0] in ("points", "percent") and parts[1].lower() in courses:
+            course = courses[parts[1].lower()]
+            try:
+                low, high = Fraction(parts[2]), Fraction(parts[3])
+            except (ValueError, ZeroDivisionError):
+                return False
+            if parts[0] == "points":
+                learners = self.tracker.query_points_range(course, math.ceil(low), math.floor(high))
+            else:
+                learners = self.tracker.query_completion_range(course, low, high)
+            self.print_query_rows(
+                self.statistics.format_course_learner(student_id, points,
+                                                      self.statistics.calculate_course_completion(course, points))
+                for student_id, points in learners)
+        else:
+            return False
+        return True
+
+    def print_query_rows(self, rows):
+        rows = iter(rows)
+        first_row = next(rows, None)
+        if first_row is None:
+            print("No students found.")
+        else:
+            self.write_rows(chain([first_row], rows))
+
+    def export_command(self):
+        self.prompt(f"Enter a directory and a format ({', '.join(EXPORT_FORMATS)}) or 'back' to return:")
+        while True:
+            line = self.read_line().strip()
+            if line == "back":
+                break
+            parts = line.rsplit(maxsplit=1)
+            if len(parts) != 2 or parts[1].lower() not in EXPORT_FORMATS:
+                print("Incorrect export.")
+                continue
+            directory, file_format = parts
+            try:
+                rows = self.tracker.export(directory, file_format.lower())
+            except OSError as error:
+                print(f"Export failed: {error.strerror}.")
+            else:
+                print(f"Exported {rows['students']} students to {directory}.")
+
+    def metrics_command(self):
+        if self.metrics is None:
+            print("Metrics are not enabled.")
+        else:
+            print(self.metrics.format_table())
+
     def statistics_command(self):
-        print("Type the name of a course to see details or 'back' to quit:")
+        self.prompt("Type the name of a course to see details or 'back' to quit:")
 
         if self.tracker.students:
-            self.statistics.calculate_course_statistics(self.tracker.students)
+            self.statistics.update_statistics_from_totals(self.tracker.enrollment_totals,
+                                                          self.tracker.submission_totals,
+                                                          self.tracker.point_totals)
 
         stats = self.statistics.get_statistics()
         print(f"Most popular: {stats['MP']}\n"
@@ -328,51 +1848,169 @@ class UserMenu:
               f"Hardest course: {stats['HC']}")
 
         while True:
-            course = input().lower().strip()
+            course = self.read_line().lower().strip()
             if course == "back":
                 break
             if course in [course.lower() for course in self.statistics.courses]:
-                self.statistics.show_course_top_learners(course, self.tracker.students)
+                self.show_course_learners(course)
             else:
                 print("Unknown course.")
 
+    def show_course_learners(self, course, offset=0):
+        print(self.statistics.course_display_name(course))
+        print(self.statistics.LEARNERS_HEADER)
+        page_size = self.page_size or self.OUTPUT_CHUNK_SIZE
+        leaderboards = self.tracker.leaderboards
+        pages = (self.statistics.render_course_learners_page(course, leaderboards, page_offset, page_size)
+                 for page_offset in range(offset, len(leaderboards[self.statistics.course_display_name(course)]),
+                                          page_size))
+        self.write_pages(pages)
+
     def notify_command(self):
-        self.notifications.notify_students(self.tracker.students)
+        self.notifications.notify_completions(self.tracker.drain_completions())
 
     def display_menu(self):
         self.greet_user()
         while True:
-            user_command = input().lower().strip()
-            if user_command == "exit":
-                self.exit_command()
+            user_command = self.read_line().lower().strip()
+            if not self.run_command(user_command):
                 break
-            elif user_command == "add students":
-                self.add_students_command()
-            elif user_command == "list":
-                self.list_students_command()
-            elif user_command == "add points":
-                self.add_points_command()
-            elif user_command == "find":
-                self.find_student_command()
-            elif user_command == "statistics":
-                self.statistics_command()
-            elif user_command == "notify":
-                self.notify_command()
-            elif user_command == "back":
-                print("Enter 'exit' to exit the program.")
-            elif user_command.strip() == "":
-                print("No input")
-            else:
-                print("Unknown command.")
+
+    def run_script(self, lines, output, jsonl=False):
+        # Non-interactive mode: commands come from lines, prompts are suppressed and
+        # everything is written through the single buffered output stream.
+        # With jsonl every command becomes one JSON object with its input and output lines.
+        self.input_lines = iter(lines)
+        self.show_prompts = False
+        with contextlib.redirect_stdout(output):
+            while True:
+                try:
+                    user_command = self.read_line().lower().strip()
+                except EOFError:
+                    break
+
+                if jsonl:
+                    self.consumed_lines = []
+                    with contextlib.redirect_stdout(io.StringIO()) as captured:
+                        keep_running = self.run_script_command(user_command)
+                    output.write(json.dumps({"command": user_command,
+                                             "input": self.consumed_lines,
+                                             "output": captured.getvalue().splitlines()}) + "\n")
+                else:
+                    keep_running = self.run_script_command(user_command)
+                if not keep_running:
+                    break
+        output.flush()
+
+    def run_script_command(self, user_command):
+        # A script may end in the middle of a command, which finishes the run
+        try:
+            return self.run_command(user_command)
+        except EOFError:
+            return False
+
+    def run_command(self, user_command):
+        # Returns False once the user asked to exit
+        if self.metrics is None:
+            return self.dispatch_command(user_command)
+        with self.metrics.measure_command(user_command):
+            return self.dispatch_command(user_command)
+
+    def dispatch_command(self, user_command):
+        if user_command == "exit":
+            self.exit_command()
+            return False
+        elif user_command == "add students":
+            self.add_students_command()
+        elif user_command == "list":
+            self.list_students_command()
+        elif user_command == "add points":
+            self.add_points_command()
+        elif user_command == "find":
+            self.find_student_command()
+        elif user_command == "statistics":
+            self.statistics_command()
+        elif user_command == "notify":
+            self.notify_command()
+        elif user_command == "activity":
+            self.activity_command()
+        elif user_command == "metrics":
+            self.metrics_command()
+        elif user_command == "query":
+            self.query_command()
+        elif user_command == "export":
+            self.export_command()
+        elif user_command == "back":
+            print("Enter 'exit' to exit the program.")
+        elif user_command.strip() == "":
+            print("No input")
+        else:
+            print("Unknown command.")
+        return True
 
 
-def main():
+def parse_arguments(args=None):
+    parser = argparse.ArgumentParser(description="Learning Progress Tracker")
+    parser.add_argument("--db", help="SQLite file to load the tracker from and save it to")
+    parser.add_argument("--script", help="run the commands from this file ('-' for stdin) without prompts")
+    parser.add_argument("--jsonl", action="store_true", help="with --script, write one JSON object per command")
+    parser.add_argument("--courses", help="JSON file mapping course names to the points required to complete them")
+    parser.add_argument("--metrics", help="collect metrics and write them to this JSON file on exit")
+    parser.add_argument("--profile", action="store_true",
+                        help="with --metrics, add a cProfile and tracemalloc capture of every command to the file")
+    parser.add_argument("--id-scheme", choices=ID_GENERATORS, default="sha256",
+                        help="how new student ids are generated")
+    parser.add_argument("--page-size", type=int,
+                        help="show students and course learners this many rows at a time, asking before each next page")
+    arguments = parser.parse_args(args)
+    if arguments.page_size is not None and arguments.page_size < 1:
+        parser.error("--page-size must be a positive number")
+    if arguments.profile and arguments.metrics is None:
+        # The captures are only written to the metrics file
+        parser.error("--profile requires --metrics")
+    return arguments
+
+
+def run_script(menu, script, jsonl):
+    with contextlib.ExitStack() as stack:
+        if script == "-":
+            lines = sys.stdin
+        else:
+            lines = stack.enter_context(open(script, buffering=UserMenu.SCRIPT_BUFFER_SIZE))
+        output = stack.enter_context(open(sys.stdout.fileno(), "w", buffering=UserMenu.SCRIPT_BUFFER_SIZE,
+                                          closefd=False))
+        menu.run_script(lines, output, jsonl)
+
+
+def main(args=None):
+    arguments = parse_arguments(args)
+    course_catalog = None if arguments.courses is None else load_course_catalog(arguments.courses)
+    # The columnar store lets exports read a snapshot that shares its columns instead of copying every student
+    tracker = LearningProgressTracker(columnar=True, id_generator=ID_GENERATORS[arguments.id_scheme](),
+                                      course_catalog=course_catalog)
+    tracker.activity = ActivityLog(tracker.courses)
+    menu = UserMenu(tracker, page_size=arguments.page_size)
+    metrics = None
+    if arguments.metrics is not None:
+        metrics = Metrics(profile=arguments.profile)
+        menu.enable_metrics(metrics)
+    store = None
+    if arguments.db is not None:
+        store = TrackerStore(arguments.db)
+        store.load(tracker, menu.notifications)
+
     try:
-        tracker = LearningProgressTracker()
-        menu = UserMenu(tracker)
-        menu.display_menu()
+        if arguments.script is None:
+            menu.display_menu()
+        else:
+            run_script(menu, arguments.script, arguments.jsonl)
     except KeyboardInterrupt:
         print("Execution interrupted. Exiting program.")
+    finally:
+        if store is not None:
+            store.close()
+        if metrics is not None:
+            metrics.dump(arguments.metrics)
 
 
 if __name__ == "__main__":
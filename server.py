@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import json
+from itertools import islice
+
+from progress_tracker import LearningProgressTracker
+from progress_tracker import Notification
+from progress_tracker import Statistics
+from progress_tracker import load_course_catalog
+from storage import TrackerStore
+
+
+class TrackerServer:
+    # Line protocol over TCP: every request is one line, every response one JSON object per line.
+    #   ADD_STUDENT <first name> <last name> <email>
+    #   ADD_POINTS <id> <points>...
+    #   FIND <id>
+    #   STATISTICS
+    #   TOP <course> [<limit> [<offset>]]
+    #   NOTIFY
+    # Requests are handled on the event loop thread and never await in the middle of a tracker
+    # update, so writes to a student are applied one at a time and reads never wait for a lock.
+    DEFAULT_TOP_LIMIT = 10
+
+    def __init__(self, tracker, notification=None):
+        self.tracker = tracker
+        self.statistics = Statistics(tracker.courses, tracker.course_completion_requirements)
+        self.notification = notification or Notification(tracker.courses, tracker.course_completion_requirements)
+        self.handlers = {"ADD_STUDENT": self.add_student,
+                         "ADD_POINTS": self.add_points,
+                         "FIND": self.find,
+                         "STATISTICS": self.show_statistics,
+                         "TOP": self.top_learners,
+                         "NOTIFY": self.notify}
+
+    async def start(self, host="127.0.0.1", port=0):
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def handle_client(self, reader, writer):
+        # A bad request is answered with an error and the connection stays open for the next one
+        try:
+            while True:
+                line = await self.read_request(reader)
+                if line == b"":
+                    break
+                if line is None:
+                    response = {"ok": False, "error": "Request is too long."}
+                else:
+                    try:
+                        request = line.decode()
+                    except UnicodeDecodeError:
+                        response = {"ok": False, "error": "Request is not valid UTF-8."}
+                    else:
+                        response = await self.handle_request(request.strip())
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_request(reader):
+        # One request line, b"" at the end of the stream or None for a line over the reader's limit.
+        # An overlong line is dropped up to its newline, so the next request starts on the next line.
+        too_long = False
+        while True:
+            try:
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as error:
+                line = error.partial
+            except asyncio.LimitOverrunError as error:
+                await reader.readexactly(error.consumed)
+                too_long = True
+                continue
+            return None if too_long else line
+
+    async def handle_request(self, line):
+        command, _, arguments = line.partition(" ")
+        handler = self.handlers.get(command.upper())
+        if handler is None:
+            return {"ok": False, "error": "Unknown command."}
+        try:
+            return await handler(arguments.strip())
+        except Exception as error:
+            return {"ok": False, "error": f"Internal error: {type(error).__name__}."}
+
+    async def add_student(self, credentials):
+        parsed_credentials = self.tracker.parse_credentials(credentials)
+        if parsed_credentials is None:
+            return {"ok": False, "error": "Incorrect credentials."}
+
+        error = self.tracker.check_student_credentials(*parsed_credentials)
+        if error is not None:
+            return {"ok": False, "error": error}
+        return {"ok": True, "id": self.tracker.register_student(*parsed_credentials)}
+
+    async def add_points(self, points):
+        result = self.tracker.add_points_bulk([points])
+        if result.rejected:
+            return {"ok": False, "error": result.rejected[0][1]}
+        return {"ok": True}
+
+    async def find(self, student_id):
+        row = self.tracker.student_index.get(student_id)
+        if row is None:
+            return {"ok": False, "error": f"No student is found for id={student_id}."}
+
+        student = self.tracker.students[row]
+        return {"ok": True,
+                "id": student["id"],
+                "points": dict(student["course_points"].items()),
+                "submissions": dict(student["course_submissions"].items())}
+
+    async def show_statistics(self, _):
+        if self.tracker.students:
+            self.statistics.update_statistics_from_totals(self.tracker.enrollment_totals,
+                                                          self.tracker.submission_totals,
+                                                          self.tracker.point_totals)
+        return {"ok": True, "statistics": dict(self.statistics.get_statistics())}
+
+    async def top_learners(self, arguments):
+        parts = arguments.split()
+        if not parts or parts[0].lower() not in [course.lower() for course in self.tracker.courses]:
+            return {"ok": False, "error": "Unknown course."}
+        numbers = parts[1:]
+        if len(numbers) > 2 or not all(number.isdigit() for number in numbers):
+            return {"ok": False, "error": "Incorrect limit or offset."}
+
+        limit = int(numbers[0]) if numbers else self.DEFAULT_TOP_LIMIT
+        offset = int(numbers[1]) if len(numbers) > 1 else 0
+        learners = self.statistics.iter_course_learners(parts[0].lower(), self.tracker.leaderboards, offset)
+        return {"ok": True, "learners": [list(learner) for learner in islice(learners, limit)]}
+
+    async def notify(self, _):
+        messages, notified_count = self.notification.collect_notifications(self.tracker.drain_completions())
+        if self.notification.sender is not None:
+            await self.notification.deliver(messages)
+        return {"ok": True,
+                "notified": notified_count,
+                "messages": [self.notification.format_notification(*message) for message in messages]}
+
+
+async def serve(tracker, notification, host, port):
+    server = await TrackerServer(tracker, notification).start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Learning Progress Tracker server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", help="SQLite file to load the tracker from and save it to")
+    parser.add_argument("--courses", help="JSON file mapping course names to the points required to complete them")
+    arguments = parser.parse_args()
+
+    course_catalog = None if arguments.courses is None else load_course_catalog(arguments.courses)
+    tracker = LearningProgressTracker(columnar=True, course_catalog=course_catalog)
+    notification = Notification(tracker.courses, tracker.course_completion_requirements)
+    store = None
+    if arguments.db is not None:
+        store = TrackerStore(arguments.db)
+        store.load(tracker, notification)
+
+    try:
+        asyncio.run(serve(tracker, notification, arguments.host, arguments.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+import json
+import mmap
+import sqlite3
+import struct
+import threading
+from array import array
+from collections import namedtuple
+
+from student import Student
+
+# Whole-column state of a columnar tracker, see LearningProgressTracker.image. Every per-course list
+# follows courses. Fields are the newline separated ids, first names, last names and emails,
+# ranked holds the (rows, points) of every leaderboard and completions the (bitmap, rows) of every course.
+TrackerImage = namedtuple("TrackerImage", ["courses", "requirements", "student_count", "fields", "points",
+                                           "submissions", "ranked", "completions", "completion_queue", "totals"])
+IMAGE_FIELDS = ("ids", "first_names", "last_names", "emails")
+
+
+class TrackerStore:
+    # Persists a LearningProgressTracker and its notified students in SQLite.
+    # SQLite runs in WAL mode, so committed batches are appended to the write-ahead log
+    # and snapshot() folds the log back into the compact database file.
+    # Changes are queued in memory and written in one transaction per batch. The queues are guarded
+    # by a lock, so a thread-safe tracker can report changes from several threads.
+    # Closing the store after a columnar tracker also saves an image of its columns, leaderboard order
+    # and completions. While no row was written after it, the next columnar load restores that image
+    # with a few bulk copies instead of reading and ranking every row.
+    def __init__(self, path, batch_size=10000):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS students (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL,
+                first_name TEXT NOT NULL,
+                last_name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                points BLOB,
+                submissions BLOB
+            );
+            CREATE TABLE IF NOT EXISTS notified (
+                course TEXT NOT NULL,
+                student_id TEXT NOT NULL,
+                PRIMARY KEY (course, student_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS image (
+                name TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+        """)
+        self.batch_size = batch_size
+        # Layout of the points and submissions blobs: every course ever saved, in the order it was first
+        # saved. It only grows, so blobs stay readable when a later run uses a reordered or smaller catalog.
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'courses'").fetchone()
+        self.courses = [] if row is None else json.loads(row[0])
+        # Row -> (points, submissions) as saved, for rows with counts in courses the tracker's catalog lacks.
+        # Rewriting such a row keeps those counts.
+        self.saved_counts = {}
+        # Whether the saved image matches the attached tracker, i.e. close has nothing to save again
+        self.image_current = False
+        self.tracker = None
+        self.new_rows = []
+        self.dirty_rows = set()
+        self.new_notifications = []
+        self.lock = threading.RLock()
+
+    def attach(self, tracker, notification):
+        self.tracker = tracker
+        tracker.store = self
+        notification.store = self
+
+    def load(self, tracker, notification):
+        # Restores everything saved so far, then keeps the store attached for new changes
+        meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+        image = self.read_image(tracker, meta)
+        if image is not None:
+            tracker.restore_image(image)
+            tracker.student_id = int(meta.get("student_id", 0))
+            self.image_current = True
+        else:
+            self.load_rows(tracker, meta)
+
+        for course, student_id in self.connection.execute("SELECT course, student_id FROM notified"):
+            if course in notification.notified_students:
+                notification.notified_students[course].add(student_id)
+
+        self.attach(tracker, notification)
+
+    def load_rows(self, tracker, meta):
+        stored_courses = self.courses
+        records = self.connection.execute(
+            "SELECT id, first_name, last_name, email, points, submissions FROM students ORDER BY row").fetchall()
+        start = tracker.append_students(record[:4] for record in records)
+        if tracker.course_store is not None and stored_courses:
+            # The blobs are joined into one row-major array and sliced into the columns
+            tracker.course_store.load_rows(start, stored_courses,
+                                           self.join_counts((record[4] for record in records), stored_courses),
+                                           self.join_counts((record[5] for record in records), stored_courses))
+        else:
+            for student, (*_, points, submissions) in zip(tracker.students[start:], records):
+                self.restore_counts(student.course_points, stored_courses, points)
+                self.restore_counts(student.course_submissions, stored_courses, submissions)
+        missing = [i for i, course in enumerate(stored_courses) if course not in tracker.courses]
+        if missing:
+            for row, (*_, points, submissions) in enumerate(records, start):
+                points, submissions = (self.join_counts([points], stored_courses),
+                                       self.join_counts([submissions], stored_courses))
+                if any(points[i] or submissions[i] for i in missing):
+                    self.saved_counts[row] = (points, submissions)
+        tracker.student_id = int(meta.get("student_id", 0))
+        tracker.rebuild_course_indexes()
+
+    def read_image(self, tracker, meta):
+        # The saved image if the tracker can restore it: a columnar tracker without students, the same
+        # courses and requirements, and every course of the blob layout known, so no saved_counts are needed
+        if (meta.get("image_current") != "1" or tracker.course_store is None or tracker.students
+                or not set(self.courses) <= set(tracker.courses)):
+            return None
+        sections = dict(self.connection.execute("SELECT name, data FROM image"))
+        header = json.loads(sections["header"])
+        if header["courses"] != tracker.courses or header["requirements"] != tracker.course_completion_requirements:
+            return None
+        courses = header["courses"]
+        return TrackerImage(courses=courses,
+                            requirements=header["requirements"],
+                            student_count=header["student_count"],
+                            fields=[sections[name] for name in IMAGE_FIELDS],
+                            points=[sections[f"points:{course}"] for course in courses],
+                            submissions=[sections[f"submissions:{course}"] for course in courses],
+                            ranked=[(sections[f"leaderboard:{course}"], sections[f"leaderboard_points:{course}"])
+                                    for course in courses],
+                            completions=[(sections[f"completed_bitmap:{course}"], sections[f"completed:{course}"])
+                                         for course in courses],
+                            completion_queue=sections["completion_queue"],
+                            totals=header["totals"])
+
+    def write_image(self, image):
+        sections = {"header": json.dumps({"courses": image.courses,
+                                          "requirements": image.requirements,
+                                          "student_count": image.student_count,
+                                          "totals": image.totals}).encode()}
+        sections.update(zip(IMAGE_FIELDS, image.fields))
+        for i, course in enumerate(image.courses):
+            sections[f"points:{course}"] = image.points[i]
+            sections[f"submissions:{course}"] = image.submissions[i]
+            sections[f"leaderboard:{course}"], sections[f"leaderboard_points:{course}"] = image.ranked[i]
+            sections[f"completed_bitmap:{course}"], sections[f"completed:{course}"] = image.completions[i]
+        sections["completion_queue"] = image.completion_queue
+        with self.connection:
+            self.connection.execute("DELETE FROM image")
+            self.connection.executemany("INSERT INTO image (name, data) VALUES (?, ?)", sections.items())
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('image_current', '1')")
+
+    @staticmethod
+    def restore_counts(counts, stored_courses, blob):
+        if blob is None:
+            return
+        for course, value in zip(stored_courses, array('q', blob)):
+            if value and course in counts:
+                counts[course] = value
+
+    @staticmethod
+    def join_counts(blobs, stored_courses):
+        # Rows saved before a course was added have shorter blobs, missing counts are 0
+        width = 8 * len(stored_courses)
+        return array('q', b"".join((blob or b"").ljust(width, b"\0") for blob in blobs))
+
+    def student_added(self, row):
+        with self.lock:
+            self.new_rows.append(row)
+            self.flush_if_full()
+
+    def points_updated(self, row):
+        # Rows are only marked here, repeated updates of one student cost a single write
+        with self.lock:
+            self.dirty_rows.add(row)
+            self.flush_if_full()
+
+    def student_notified(self, course, student_id):
+        with self.lock:
+            self.new_notifications.append((course, student_id))
+            self.flush_if_full()
+
+    def flush_if_full(self):
+        if len(self.new_rows) + len(self.dirty_rows) + len(self.new_notifications) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.tracker is None:
+            return
+
+        with self.lock:
+            self._flush(self.tracker)
+
+    def _flush(self, tracker):
+        self.courses.extend(course for course in tracker.courses if course not in self.courses)
+        positions = [self.courses.index(course) for course in tracker.courses]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO students (row, id, first_name, last_name, email) VALUES (?, ?, ?, ?, ?)",
+                ((row, student.id, student.first_name, student.last_name, student.email)
+                 for row, student in ((row, tracker.students[row]) for row in self.new_rows)))
+            self.connection.executemany(
+                "UPDATE students SET points = ?, submissions = ? WHERE row = ?",
+                (self.pack_row(tracker, row, positions) + (row,) for row in self.dirty_rows))
+            self.connection.executemany("INSERT OR IGNORE INTO notified (course, student_id) VALUES (?, ?)",
+                                        self.new_notifications)
+            meta = [("student_id", str(tracker.student_id)), ("courses", json.dumps(self.courses))]
+            if self.new_rows or self.dirty_rows:
+                meta.append(("image_current", "0"))
+                self.image_current = False
+            self.connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta)
+        self.new_rows.clear()
+        self.dirty_rows.clear()
+        self.new_notifications.clear()
+
+    def pack_row(self, tracker, row, positions):
+        # (points, submissions) blobs in the store's course layout, positions maps the tracker's courses into it
+        student = tracker.students[row]
+        saved_points, saved_submissions = self.saved_counts.get(row, (None, None))
+        return (self.pack_counts(student.course_points, tracker.courses, positions, len(self.courses), saved_points),
+                self.pack_counts(student.course_submissions, tracker.courses, positions, len(self.courses),
+                                 saved_submissions))
+
+    @staticmethod
+    def pack_counts(counts, courses, positions, width, saved=None):
+        # Courses of the layout the tracker doesn't have keep their saved counts
+        values = array('q', bytes(8 * width))
+        if saved is not None:
+            values[:len(saved)] = saved
+        for course, position in zip(courses, positions):
+            values[position] = counts[course]
+        return values.tobytes()
+
+    def snapshot(self):
+        # Writes pending changes and compacts the write-ahead log into the database file.
+        # With a columnar tracker the image is saved again if rows were written since the last one;
+        # every tracker lock is held meanwhile, so the image and the rows describe the same state.
+        tracker = self.tracker
+        if tracker is not None and tracker.course_store is not None:
+            with tracker.hold_all_locks(), self.lock:
+                self._flush(tracker)
+                if not self.image_current:
+                    self.write_image(tracker.image())
+                    self.image_current = True
+        else:
+            self.flush()
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.snapshot()
+        self.connection.close()
+
+
+SNAPSHOT_MAGIC = b"LPTSNAP1"
+# Magic, metadata length, id width, student count
+SNAPSHOT_HEADER = struct.Struct("<8sIIQ")
+
+
+def write_binary_snapshot(tracker, path):
+    # Layout: header, JSON metadata, then 8-byte aligned sections whose offsets are listed
+    # in the metadata. Every section is either fixed-width or indexed by an offsets array,
+    # so a reader can answer queries straight from the mapped file.
+    students = tracker.students
+    student_count = len(students)
+    id_width = max((len(student.id) for student in students), default=1)
+
+    sections = {"ids": b"".join(student.id.encode().ljust(id_width, b"\0") for student in students)}
+
+    text_offsets = array('Q', [0])
+    text_heap = bytearray()
+    for student in students:
+        for text in (student.first_name, student.last_name, student.email):
+            text_heap += text.encode()
+            text_offsets.append(len(text_heap))
+    sections["text_offsets"] = text_offsets.tobytes()
+    sections["text"] = bytes(text_heap)
+
+    for course in tracker.courses:
+        points_column = array('q', [student.course_points[course] for student in students])
+        submissions_column = array('q', [student.course_submissions[course] for student in students])
+        leaderboard_rows = array('I', [tracker.student_index[student_id]
+                                       for student_id, _ in tracker.leaderboards[course].iter_range()])
+        sections[f"points:{course}"] = points_column.tobytes()
+        sections[f"submissions:{course}"] = submissions_column.tobytes()
+        sections[f"leaderboard:{course}"] = leaderboard_rows.tobytes()
+
+    id_index = array('I', sorted(range(student_count), key=lambda row: students[row].id))
+    email_index = array('I', sorted(range(student_count), key=lambda row: students[row].email))
+    sections["id_index"] = id_index.tobytes()
+    sections["email_index"] = email_index.tobytes()
+
+    enrollment, submissions, points = tracker.enrollment_totals, tracker.submission_totals, tracker.point_totals
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        layout[name] = [offset, len(data)]
+        offset += len(data) + (-len(data) % 8)
+    metadata = json.dumps({"courses": tracker.courses,
+                           "requirements": tracker.course_completion_requirements,
+                           "totals": [enrollment, submissions, points],
+                           "sections": layout}).encode()
+    metadata += b" " * (-(SNAPSHOT_HEADER.size + len(metadata)) % 8)
+
+    with open(path, "wb") as file:
+        file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(metadata), id_width, student_count))
+        file.write(metadata)
+        for data in sections.values():
+            file.write(data)
+            file.write(b"\0" * (-len(data) % 8))
+
+
+class MappedSnapshot:
+    # Read-only view of a binary snapshot. Opening it only parses the header and metadata,
+    # pages are loaded by the OS when a query touches them and shared between processes.
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.mapping = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mapping)
+
+        magic, metadata_length, self.id_width, self.student_count = SNAPSHOT_HEADER.unpack_from(self.mapping)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a tracker snapshot")
+        data_start = SNAPSHOT_HEADER.size + metadata_length
+        metadata = json.loads(bytes(self.view[SNAPSHOT_HEADER.size:data_start]))
+
+        self.courses = metadata["courses"]
+        self.course_completion_requirements = metadata["requirements"]
+        self.totals = tuple(metadata["totals"])
+        self.sections = {name: (data_start + offset, length) for name, (offset, length) in metadata["sections"].items()}
+
+        self.views = []
+        self.ids = self.section("ids")
+        self.text_offsets = self.section("text_offsets", 'Q')
+        self.text = self.section("text")
+        self.id_index = self.section("id_index", 'I')
+        self.email_index = self.section("email_index", 'I')
+        self.points_columns = {course: self.section(f"points:{course}", 'q') for course in self.courses}
+        self.submissions_columns = {course: self.section(f"submissions:{course}", 'q') for course in self.courses}
+        self.leaderboards = {course: MappedLeaderboard(self, course) for course in self.courses}
+
+    def section(self, name, item_format=None):
+        offset, length = self.sections[name]
+        data = self.view[offset:offset + length]
+        if item_format is not None:
+            data = data.cast(item_format)
+        self.views.append(data)
+        return data
+
+    def student_id(self, row):
+        return bytes(self.ids[row * self.id_width:(row + 1) * self.id_width]).rstrip(b"\0").decode()
+
+    def text_field(self, row, field):
+        start = self.text_offsets[3 * row + field]
+        return bytes(self.text[start:self.text_offsets[3 * row + field + 1]]).decode()
+
+    def find_row(self, index, key, key_of_row):
+        low, high = 0, len(index)
+        while low < high:
+            middle = (low + high) // 2
+            if key_of_row(index[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(index) and key_of_row(index[low]) == key:
+            return index[low]
+        return None
+
+    def find_student_by_id(self, student_id):
+        row = self.find_row(self.id_index, student_id, self.student_id)
+        return None if row is None else self.student(row)
+
+    def find_student_by_email(self, email):
+        row = self.find_row(self.email_index, email.lower(), lambda row: self.text_field(row, 2))
+        return None if row is None else self.student(row)
+
+    def student(self, row):
+        return Student(self.student_id(row), self.text_field(row, 0), self.text_field(row, 1), self.text_field(row, 2),
+                       {course: column[row] for course, column in self.points_columns.items()},
+                       {course: column[row] for course, column in self.submissions_columns.items()})
+
+    def course_totals(self):
+        return self.totals
+
+    def close(self):
+        for view in self.views:
+            view.release()
+        self.view.release()
+        self.mapping.close()
+        self.file.close()
+
+
+class MappedLeaderboard:
+    # Same read API as progress_tracker.Leaderboard over the rows stored in a snapshot
+    def __init__(self, snapshot, course):
+        self.snapshot = snapshot
+        self.course = course
+        self.rows = snapshot.section(f"leaderboard:{course}", 'I')
+        self.version = 0  # A snapshot never changes
+
+    def __len__(self):
+        return len(self.rows)
+
+    def iter_range(self, offset=0, limit=None):
+        end = len(self.rows) if limit is None else min(len(self.rows), offset + limit)
+        points = self.snapshot.points_columns[self.course]
+        for position in range(offset, end):
+            row = self.rows[position]
+            yield self.snapshot.student_id(row), points[row]
+
+    def top_k(self, k):
+        return list(self.iter_range(0, k))
@@ -0,0 +1,57 @@
+import sys
+from collections.abc import Mapping
+
+
+class StudentRecord(Mapping):
+    # Slotted student record that still reads like the dict records used before:
+    # student["email"], student.items() and comparisons with dicts keep working.
+    # Names are interned, so students sharing a first or last name share one string,
+    # and the full name used in notifications is formatted once on first use.
+    # Subclasses decide where course_points and course_submissions come from.
+    __slots__ = ("id", "first_name", "last_name", "email", "_full_name")
+    FIELDS = ("id", "first_name", "last_name", "email", "course_points", "course_submissions")
+
+    def __init__(self, student_id, first_name, last_name, email):
+        self.id = student_id
+        self.first_name = sys.intern(first_name)
+        self.last_name = sys.intern(last_name)
+        self.email = email
+        self._full_name = None
+
+    @property
+    def full_name(self):
+        if self._full_name is None:
+            self._full_name = f"{self.first_name} {self.last_name}"
+        return self._full_name
+
+    def __getitem__(self, field):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        if field in ("first_name", "last_name"):
+            value = sys.intern(value)
+            self._full_name = None
+        setattr(self, field, value)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+
+class Student(StudentRecord):
+    # Record that holds its own course -> points and course -> submissions mappings
+    __slots__ = ("course_points", "course_submissions")
+
+    def __init__(self, student_id, first_name, last_name, email, course_points, course_submissions):
+        super().__init__(student_id, first_name, last_name, email)
+        self.course_points = course_points
+        self.course_submissions = course_submissions
@@ -0,0 +1,92 @@
+from activity import ActivityLog
+from activity import SECONDS_PER_DAY
+from progress_tracker import LearningProgressTracker
+from progress_tracker import UserMenu
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def create_tracker(clock):
+    tracker = LearningProgressTracker()
+    tracker.activity = ActivityLog(tracker.courses, clock)
+    tracker.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com"])
+    return tracker
+
+
+class TestActivityLog:
+    def test_points_changes_are_logged_with_their_time(self):
+        clock = FakeClock(10 * SECONDS_PER_DAY + 60)
+        sut = create_tracker(clock)
+        sut.add_points("6b86b273ff 8 7 0 0")
+        clock.now += SECONDS_PER_DAY
+        sut.add_points("d4735e3a26 5 0 0 3")
+        sut.add_points_bulk(["6b86b273ff 2 0 0 0", "6b86b273ff 1 0 0 0"])
+        clock.now += 3 * SECONDS_PER_DAY
+        sut.add_points("6b86b273ff 0 0 4 0")
+
+        assert len(sut.activity) == 6
+        assert list(sut.activity.iter_events(11 * SECONDS_PER_DAY, 12 * SECONDS_PER_DAY)) == [
+            (11 * SECONDS_PER_DAY + 60, 1, "Python", 5, 1),
+            (11 * SECONDS_PER_DAY + 60, 1, "Flask", 3, 1),
+            (11 * SECONDS_PER_DAY + 60, 0, "Python", 3, 2)]
+        assert [day for day, _ in sut.activity.daily_totals(0, 100)] == [10, 11, 14]
+        assert sut.activity.window_totals(4) == {"Python": (2, 8, 3), "DSA": (0, 0, 0),
+                                                 "Databases": (1, 4, 1), "Flask": (1, 3, 1)}
+        assert sut.activity.window_totals(1)["Databases"] == (1, 4, 1)
+        assert sut.activity.window_totals(7)["Python"] == (3, 16, 4)
+
+    def test_courses_added_later_read_as_zero_in_older_partitions(self):
+        clock = FakeClock(10 * SECONDS_PER_DAY)
+        sut = create_tracker(clock)
+        sut.add_points("6b86b273ff 8 0 0 0")
+        sut.add_course("SQL", 300)
+
+        assert sut.activity.window_totals(1)["SQL"] == (0, 0, 0)
+        assert dict(sut.activity.daily_totals(0, 100))[10]["SQL"] == (0, 0, 0)
+
+        sut.add_points("d4735e3a26 0 0 0 0 5")
+        assert sut.activity.window_totals(1) == {"Python": (1, 8, 1), "DSA": (0, 0, 0), "Databases": (0, 0, 0),
+                                                 "Flask": (0, 0, 0), "SQL": (1, 5, 1)}
+
+    def test_range_queries_accept_out_of_order_timestamps(self):
+        log = ActivityLog(["Python"])
+        for timestamp in (500, 100, 300, SECONDS_PER_DAY + 5):
+            log.record(timestamp, 0, 0, 1, 1)
+
+        assert [event[0] for event in log.iter_events(100, 400)] == [100, 300]
+        assert [event[0] for event in log.iter_events(0, 2 * SECONDS_PER_DAY)] == [500, 100, 300, SECONDS_PER_DAY + 5]
+
+    def test_event_columns_take_tens_of_bytes(self):
+        log = ActivityLog(["Python"])
+        log.record(0, 0, 0, 1, 1)
+        partition = log.partitions[0]
+        columns = (partition.timestamps, partition.rows, partition.course_indexes, partition.points,
+                   partition.submissions)
+        assert sum(column.itemsize for column in columns) == 26
+
+    def test_activity_command_prints_window_totals(self, capsys, monkeypatch):
+        clock = FakeClock(10 * SECONDS_PER_DAY)
+        sut = create_tracker(clock)
+        sut.add_points("6b86b273ff 8 7 0 0")
+        clock.now += 2 * SECONDS_PER_DAY
+        sut.add_points("d4735e3a26 5 0 0 0")
+        capsys.readouterr()
+        answers = iter(["2", "0", "back"])
+        monkeypatch.setattr("builtins.input", lambda: next(answers))
+
+        UserMenu(sut).activity_command()
+
+        assert capsys.readouterr().out == ("Enter the number of days or 'back' to return:\n"
+                                           "Activity in the last 2 days:\n"
+                                           "course       events     points     submissions\n"
+                                           "Python       1          5          1\n"
+                                           "DSA          0          0          0\n"
+                                           "Databases    0          0          0\n"
+                                           "Flask        0          0          0\n"
+                                           "Incorrect number of days.\n")
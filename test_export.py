@@ -0,0 +1,92 @@
+import csv
+import json
+
+import pytest
+
+from export import export_snapshot
+from export import iter_columnar_row_groups
+from export import read_columnar
+from progress_tracker import LearningProgressTracker
+from progress_tracker import Statistics
+from progress_tracker import UserMenu
+
+
+def create_tracker(columnar=False):
+    tracker = LearningProgressTracker(columnar=columnar)
+    tracker.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com",
+                               "Jean-Clause van-Helsing jcvh@email.net"])
+    tracker.add_points("6b86b273ff 8 7 7 5")
+    tracker.add_points("d4735e3a26 600 0 0 3")
+    tracker.add_points("4e07408562 8 0 0 0")
+    return tracker
+
+
+class TestExport:
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_every_format_exports_the_same_tables(self, tmp_path, columnar):
+        sut = create_tracker(columnar)
+
+        for file_format in ("csv", "jsonl", "columnar"):
+            assert sut.export(tmp_path / file_format, file_format) == {"students": 3, "leaderboards": 7,
+                                                                        "statistics": 6}
+
+        with open(tmp_path / "csv" / "students.csv", newline="") as file:
+            csv_rows = list(csv.DictReader(file))
+        with open(tmp_path / "jsonl" / "students.jsonl") as file:
+            json_rows = [json.loads(line) for line in file]
+        columns = read_columnar(tmp_path / "columnar" / "students.col")
+
+        assert json_rows[2] == {"id": "4e07408562", "first_name": "Jean-Clause", "last_name": "Van-Helsing",
+                                "email": "jcvh@email.net", "points:Python": 8, "points:DSA": 0,
+                                "points:Databases": 0, "points:Flask": 0, "submissions:Python": 1,
+                                "submissions:DSA": 0, "submissions:Databases": 0, "submissions:Flask": 0}
+        assert [{name: str(value) for name, value in row.items()} for row in json_rows] == csv_rows
+        assert [dict(zip(columns, row)) for row in zip(*columns.values())] == json_rows
+
+    def test_leaderboards_and_statistics_tables(self, tmp_path):
+        sut = create_tracker()
+        sut.export(tmp_path / "jsonl", "jsonl")
+        sut.export(tmp_path / "columnar", "columnar")
+
+        with open(tmp_path / "jsonl" / "leaderboards.jsonl") as file:
+            json_rows = [json.loads(line) for line in file]
+        leaderboards = read_columnar(tmp_path / "columnar" / "leaderboards.col")
+        statistics = read_columnar(tmp_path / "columnar" / "statistics.col")
+
+        assert json_rows[:3] == [
+            {"course": "Python", "rank": 1, "id": "d4735e3a26", "points": 600, "completion": 100.0},
+            {"course": "Python", "rank": 2, "id": "4e07408562", "points": 8, "completion": 1.3},
+            {"course": "Python", "rank": 3, "id": "6b86b273ff", "points": 8, "completion": 1.3}]
+        assert leaderboards["course"] == ["Python", "Python", "Python", "DSA", "Databases", "Flask", "Flask"]
+        assert leaderboards["rank"] == [1, 2, 3, 1, 1, 1, 2]
+        assert leaderboards["id"][-2:] == [student_id for student_id, _ in sut.top_k("Flask", 2)]
+        assert statistics == {"statistic": ["Most popular", "Least popular", "Highest activity", "Lowest activity",
+                                            "Easiest course", "Hardest course"],
+                              "courses": ["Python", "DSA, Databases", "Python", "DSA, Databases", "Python", "Flask"]}
+
+    def test_chunks_split_tables_into_row_groups(self, tmp_path):
+        sut = create_tracker(columnar=True)
+        with sut.take_snapshot() as snapshot:
+            statistics = Statistics(snapshot.courses, snapshot.course_completion_requirements)
+            export_snapshot(snapshot, statistics, tmp_path, "columnar", chunk_rows=2)
+
+        row_groups = list(iter_columnar_row_groups(tmp_path / "students.col"))
+        assert [row_group["id"] for row_group in row_groups] == [["6b86b273ff", "d4735e3a26"], ["4e07408562"]]
+        assert row_groups[1]["points:Python"] == [8]
+        with pytest.raises(ValueError):
+            export_snapshot(snapshot, statistics, tmp_path, "xml")
+
+    def test_export_command(self, tmp_path, capsys, monkeypatch):
+        sut = create_tracker()
+        answers = iter([f"{tmp_path} csv", "out", "back"])
+        monkeypatch.setattr("builtins.input", lambda: next(answers))
+        capsys.readouterr()
+
+        UserMenu(sut).export_command()
+
+        assert capsys.readouterr().out == (
+            "Enter a directory and a format (csv, jsonl, columnar) or 'back' to return:\n"
+            f"Exported 3 students to {tmp_path}.\n"
+            "Incorrect export.\n")
+        assert (tmp_path / "statistics.csv").read_text().splitlines()[1] == "Most popular,Python"
+
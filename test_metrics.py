@@ -0,0 +1,85 @@
+import io
+import json
+
+import pytest
+
+from metrics import LatencyHistogram
+from metrics import Metrics
+from progress_tracker import LearningProgressTracker
+from progress_tracker import UserMenu
+from progress_tracker import main
+
+
+def run_commands(menu, lines):
+    output = io.StringIO()
+    menu.run_script(lines, output)
+    return output.getvalue()
+
+
+class TestMetrics:
+    def test_percentiles_are_within_a_bucket_of_the_real_latency(self):
+        histogram = LatencyHistogram()
+        for microseconds in range(1, 101):
+            histogram.record(microseconds / 1e6)
+
+        assert 50e-6 <= histogram.percentile(50) <= 50e-6 * 1.1
+        assert 99e-6 <= histogram.percentile(99) <= 99e-6 * 1.1
+        assert LatencyHistogram().percentile(50) is None
+
+    def test_menu_commands_and_hot_paths_are_measured(self, tmp_path, capsys):
+        sut = LearningProgressTracker()
+        menu = UserMenu(sut)
+        metrics = Metrics()
+        menu.enable_metrics(metrics)
+
+        output = run_commands(menu, ["add students", "John Doe johnd@email.net", "Jane Spark jspark@yahoo.com",
+                                     "back", "add points", "6b86b273ff 600 0 0 0", "1000 1 1 1 1", "back",
+                                     "statistics", "python", "back", "notify", "metrics", "exit"])
+        operations = metrics.to_dict()["operations"]
+
+        assert operations["LearningProgressTracker.add_students"]["calls"] == 2
+        assert operations["LearningProgressTracker.add_points"]["calls"] == 2
+        assert operations["LearningProgressTracker.find_student_by_id"]["calls"] == 2
+        assert operations["Statistics.render_course_learners_page"]["rows_scanned"] == 1
+        assert operations["Notification.notify_completions"]["rows_scanned"] == 1
+        assert operations["command:add students"]["bytes_printed"] == len(
+            "The student has been added.\nThe student has been added.\nTotal 2 students have been added.\n")
+        assert operations["command:notify"]["calls"] == 1
+        assert operations["command:add points"]["p50_ms"] <= operations["command:add points"]["p99_ms"]
+        assert "LearningProgressTracker.add_points" in output.split("Total 1 students have been notified.\n")[1]
+
+        path = tmp_path / "metrics.json"
+        metrics.dump(path)
+        assert json.loads(path.read_text())["operations"]["command:exit"]["calls"] == 1
+
+    def test_profile_captures_every_command(self):
+        sut = LearningProgressTracker()
+        menu = UserMenu(sut)
+        metrics = Metrics(profile=True)
+        menu.enable_metrics(metrics)
+
+        run_commands(menu, ["add students", "John Doe johnd@email.net", "back", "list", "list", "exit"])
+
+        assert len(metrics.profiles["list"]) == 2
+        capture = metrics.profiles["add students"][0]
+        assert "register_student" in capture["profile"]
+        assert capture["peak_bytes"] >= capture["allocated_bytes"]
+
+    def test_profile_is_written_to_the_metrics_file(self, tmp_path, capfd):
+        script = tmp_path / "commands.txt"
+        script.write_text("list\nexit\n")
+        path = tmp_path / "metrics.json"
+
+        main(["--script", str(script), "--metrics", str(path), "--profile"])
+
+        assert "list" in json.loads(path.read_text())["profiles"]
+        with pytest.raises(SystemExit):
+            main(["--script", str(script), "--profile"])
+        assert "--profile requires --metrics" in capfd.readouterr().err
+
+    def test_nothing_is_instrumented_without_metrics(self):
+        sut = LearningProgressTracker()
+        menu = UserMenu(sut)
+
+        assert run_commands(menu, ["metrics", "exit"]) == "Metrics are not enabled.\nBye!\n"
+        assert "add_points" not in vars(sut)
@@ -1,6 +1,19 @@
 from progress_tracker import LearningProgressTracker
 from progress_tracker import Statistics
 from progress_tracker import Notification
+from progress_tracker import FileSender
+from progress_tracker import Leaderboard
+from progress_tracker import UserMenu
+from progress_tracker import Sha256IdGenerator
+from progress_tracker import PrecomputedSha256IdGenerator
+from progress_tracker import Mix64IdGenerator
+from progress_tracker import load_course_catalog
+from progress_tracker import main
+import io
+import json
+import random
+import sys
+import threading
 import pytest
 
 
@@ -47,6 +60,41 @@ class TestCredentialsValidation:
 
         assert sut.is_email_unique("foo@gmail.com"), f"Expected the email to be unique"
 
+    def test_registry_indexes_follow_insertion_order(self):
+        sut = LearningProgressTracker()
+        sut.add_students("John Doe johnd@yahoo.com")
+        sut.add_students("Jane Spark jspark@gmail.com")
+        sut.add_students("Jane Twin jspark@gmail.com")
+
+        assert sut.student_index == {"6b86b273ff": 0, "d4735e3a26": 1}
+        assert sut.email_index == {"johnd@yahoo.com": 0, "jspark@gmail.com": 1}
+        assert sut.find_student_by_id("d4735e3a26") is sut.students[1]
+
+
+class TestIdGenerators:
+    def test_precomputed_ids_match_the_sha256_scheme(self):
+        sha256 = Sha256IdGenerator()
+        precomputed = PrecomputedSha256IdGenerator(block_size=100)
+        counters = list(range(1, 350)) + list(range(5000, 5010))
+        assert [precomputed.generate_id(i) for i in counters] == [sha256.generate_id(i) for i in counters]
+        assert precomputed.generate_id(1) == "6b86b273ff"
+
+    def test_mix64_ids_are_distinct_fixed_width_hex(self):
+        ids = [Mix64IdGenerator().generate_id(i) for i in range(1, 10001)]
+        assert len(set(ids)) == len(ids)
+        assert all(len(student_id) == 16 and int(student_id, 16) >= 0 for student_id in ids)
+        assert Mix64IdGenerator(seed=1).generate_id(1) != ids[0]
+
+    def test_colliding_id_is_skipped(self):
+        class CollidingIdGenerator:
+            def generate_id(self, counter):
+                return str(counter // 2)
+
+        sut = LearningProgressTracker(id_generator=CollidingIdGenerator())
+        sut.add_students_bulk([f"John Doe john{i}@email.net" for i in range(3)])
+        assert [student["id"] for student in sut.students] == ["0", "1", "2"]
+        assert sut.student_id == 4
+
 
 class TestPointsOperations:
     def test_points_validation(self):
@@ -68,6 +116,20 @@ class TestPointsOperations:
         assert student_id == "1000"
         assert points_to_add == [25, 5, 3, 74]
 
+    def test_fast_path_parser_agrees_with_validation_and_parsing(self):
+        sut = LearningProgressTracker()
+        lines = ["1 5 5 5 5", "1000 25 5 3 74", "0 0 0 0 0", "d4735e3a26 4 11 0 7", "id 1 2 3 4\n",
+                 "", "-1 1 1 1", "1 1 2 A", "1 1 1", "1010 -12 5 6 8", "2.5 2.5 2.4 1.8", "1  5 5 5 5"]
+
+        for line in lines:
+            record = sut.parse_points_line(line)
+            if sut.validate_points(line):
+                assert record == sut.parse_points(line), f"Expected '{line}' to be parsed like parse_points"
+            else:
+                assert record is None, f"Expected '{line}' to be rejected"
+
+        assert sut.parse_points_line("1000 25 5 3 74").points == [25, 5, 3, 74]
+
     def test_points_are_added_to_selected_student(self):
         sut = LearningProgressTracker()
 
@@ -108,6 +170,407 @@ class TestPointsOperations:
         assert captured.out.strip() == "No student is found for id=6b86b273ff.", f"The message when the student is not found does not match the expected message"
 
 
+class TestBulkIngestion:
+    def test_students_bulk_reports_rejections_without_printing(self, capsys):
+        sut = LearningProgressTracker()
+        sut.add_students("John Doe johnd@yahoo.com")
+
+        result = sut.add_students_bulk(["Jane Spark jspark@gmail.com",
+                                        "Jane",
+                                        ("Robert", "Van de Graaff", "robertvdgraaff@mit.edu"),
+                                        "Jane Twin JSPARK@gmail.com",
+                                        "John Other johnd@yahoo.com",
+                                        "-name surname email@email.xyz"])
+
+        assert capsys.readouterr().out == "The student has been added.\n"
+        assert result.accepted == 2
+        assert result.rejected == [(2, "Incorrect credentials."),
+                                   (4, "This email is already taken."),
+                                   (5, "This email is already taken."),
+                                   (6, "Incorrect first name.")]
+        assert [student["id"] for student in sut.students] == ["6b86b273ff", "d4735e3a26", "4e07408562"]
+        assert sut.students[2]["last_name"] == "Van De Graaff"
+
+    def test_malformed_records_are_rejected_per_line(self):
+        sut = LearningProgressTracker()
+        sut.add_students_bulk(["John Doe johnd@email.net"])
+
+        students = sut.add_students_bulk([("John", "j@x.com"), ("Jane", None, "jane@x.com"), None,
+                                          ("Jane", "Spark", "jspark@yahoo.com")])
+        points = sut.add_points_bulk([(), ("6b86b273ff", True, 0, 0, 0), (None, 1, 1, 1, 1), 5,
+                                      ("6b86b273ff", 1, 0, 0, 0)])
+
+        assert students.accepted == 1
+        assert students.rejected == [(1, "Incorrect credentials."), (2, "Incorrect credentials."),
+                                     (3, "Incorrect credentials.")]
+        assert points.accepted == 1
+        assert [line_number for line_number, _ in points.rejected] == [1, 2, 3, 4]
+        assert sut.students[0]["course_points"]["Python"] == 1
+
+    def test_points_bulk_matches_line_by_line_updates(self):
+        lines = ["6b86b273ff 8 7 7 5", "d4735e3a26 8 0 8 6", "6b86b273ff 0 6 9 7",
+                 "1000 1 1 1 1", "6b86b273ff 1 1 A 1"]
+        serial = LearningProgressTracker()
+        bulk = LearningProgressTracker()
+        for sut in (serial, bulk):
+            sut.add_students("John Doe johnd@email.net")
+            sut.add_students("Jane Spark jspark@yahoo.com")
+        for line in lines:
+            serial.add_points(line)
+
+        result = bulk.add_points_bulk(lines[:3] + [("d4735e3a26", 1, 2), ("d4735e3a26", 0, 0, 0, 0)] + lines[3:])
+
+        assert result.accepted == 4
+        assert result.rejected == [(4, "Incorrect points format."),
+                                   (6, "No student is found for id=1000."),
+                                   (7, "Incorrect points format.")]
+        for serial_student, bulk_student in zip(serial.students, bulk.students):
+            assert bulk_student["course_points"] == serial_student["course_points"]
+            assert bulk_student["course_submissions"] == serial_student["course_submissions"]
+
+
+class TestShardedIngestion:
+    def test_sharded_ingestion_matches_serial_add_points(self):
+        rng = random.Random(3)
+        serial = LearningProgressTracker()
+        sharded = LearningProgressTracker()
+        for sut in (serial, sharded):
+            sut.add_students_bulk([f"John Doe john{i}@email.net" for i in range(40)])
+        student_ids = [student["id"] for student in serial.students]
+        lines = [f"{rng.choice(student_ids)} {rng.randrange(50)} {rng.randrange(50)} {rng.randrange(3)} 0"
+                 for _ in range(2000)]
+        lines[10] = "1000 1 1 1 1"
+        lines[20] = "not a points line"
+        expected = serial.add_points_bulk(lines)
+
+        result = sharded.add_points_sharded(lines, processes=2, chunk_size=100)
+
+        assert result.accepted == expected.accepted
+        assert result.rejected == [(11, "No student is found for id=1000."), (21, "Incorrect points format.")]
+        for serial_student, sharded_student in zip(serial.students, sharded.students):
+            assert sharded_student["course_points"] == serial_student["course_points"]
+            assert sharded_student["course_submissions"] == serial_student["course_submissions"]
+        for course in sharded.courses:
+            assert list(sharded.leaderboards[course].iter_range()) == list(serial.leaderboards[course].iter_range())
+        assert sharded.verify_course_totals()
+
+
+class TestThreadSafety:
+    def run_threads(self, target, arguments):
+        threads = [threading.Thread(target=target, args=argument) for argument in arguments]
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+    def test_concurrent_writers_keep_registry_and_totals_consistent(self, capsys):
+        sut = LearningProgressTracker(thread_safe=True)
+        emails = [f"john{i}@email.net" for i in range(200)]
+
+        def register(seed):
+            # Every thread tries to take every email, each one must be registered exactly once
+            shuffled = random.Random(seed).sample(emails, len(emails))
+            for i, email in enumerate(shuffled):
+                if i % 2:
+                    sut.add_students(f"John Doe {email}")
+                else:
+                    sut.add_students_bulk([("John", "Doe", email)])
+
+        self.run_threads(register, [(seed,) for seed in range(8)])
+
+        assert len(sut.students) == sut.student_id == 200
+        assert len({student["id"] for student in sut.students}) == 200
+        assert sorted(student["email"] for student in sut.students) == sorted(emails)
+
+        student_ids = [student["id"] for student in sut.students]
+        lines = [[f"{rng.choice(student_ids)} {rng.randrange(20)} {rng.randrange(20)} 0 {rng.randrange(20)}"
+                  for _ in range(1000)] for rng in map(random.Random, range(8))]
+        serial = LearningProgressTracker()
+        serial.add_students_bulk([("John", "Doe", student["email"]) for student in sut.students])
+        for thread_lines in lines:
+            serial.add_points_bulk(thread_lines)
+
+        def add_points(thread_lines, bulk):
+            if bulk:
+                sut.add_points_bulk(thread_lines)
+            else:
+                for line in thread_lines:
+                    sut.add_points(line)
+
+        self.run_threads(add_points, [(thread_lines, i % 2 == 0) for i, thread_lines in enumerate(lines)])
+        capsys.readouterr()
+
+        for student, serial_student in zip(sut.students, serial.students):
+            assert student["course_points"] == serial_student["course_points"]
+            assert student["course_submissions"] == serial_student["course_submissions"]
+        for course in sut.courses:
+            assert list(sut.leaderboards[course].iter_range()) == list(serial.leaderboards[course].iter_range())
+        assert sut.verify_course_totals()
+        assert sut.drain_completions() == serial.drain_completions()
+
+    def test_bulk_batch_does_not_overwrite_newer_single_line_points(self, monkeypatch, capsys):
+        sut = LearningProgressTracker(thread_safe=True)
+        sut.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com"])
+        update_student_points = sut.update_student_points
+
+        def update_then_add_line(student, points_to_add, submissions_to_add, changed_points=None):
+            update_student_points(student, points_to_add, submissions_to_add, changed_points)
+            if changed_points is not None:
+                # A single-line writer runs after the batch released the student but before it
+                # reaches the leaderboards, the way another thread could
+                sut.add_points(f"{student.id} 5 0 0 0")
+
+        monkeypatch.setattr(sut, "update_student_points", update_then_add_line)
+        sut.add_points_bulk(["6b86b273ff 10 0 0 0", "d4735e3a26 3 0 0 0", "6b86b273ff 2 0 0 0"])
+        capsys.readouterr()
+
+        assert sut.students[0]["course_points"]["Python"] == 17
+        assert list(sut.leaderboards["Python"].iter_range()) == [("6b86b273ff", 17), ("d4735e3a26", 8)]
+        assert sut.course_rank("Python", "d4735e3a26") == 1
+
+
+class TestCourseCatalog:
+    def test_catalog_file_drives_validation_and_output(self, tmp_path, capsys):
+        path = tmp_path / "courses.json"
+        path.write_text(json.dumps({"Python": 600, "DSA": 400, "Databases": 480, "Flask": 550, "SQL": 300}))
+        sut = LearningProgressTracker(course_catalog=load_course_catalog(path))
+        sut.add_students("John Doe johnd@email.net")
+        capsys.readouterr()
+
+        assert sut.validate_points("6b86b273ff 1 2 3 4 5")
+        assert not sut.validate_points("6b86b273ff 1 2 3 4")
+        sut.add_points("6b86b273ff 1 2 3 4 150")
+        sut.print_student_points("6b86b273ff")
+        UserMenu(sut).show_course_learners("sql")
+
+        assert capsys.readouterr().out == ("Points updated.\n"
+                                           "6b86b273ff points: Python=1; DSA=2; Databases=3; Flask=4; SQL=150.\n"
+                                           "SQL\n"
+                                           "id           points     completed\n"
+                                           "6b86b273ff   150        50.0%\n")
+
+    def test_invalid_catalog_is_rejected(self, tmp_path):
+        path = tmp_path / "courses.json"
+        for catalog in ({}, {"Python": 600, "python": 500}, {"Python": 0}, ["Python"]):
+            path.write_text(json.dumps(catalog))
+            with pytest.raises(ValueError):
+                load_course_catalog(path)
+
+    def test_added_course_extends_existing_students(self, capsys):
+        for columnar in (False, True):
+            sut = LearningProgressTracker(columnar=columnar)
+            notification = Notification(sut.courses, sut.course_completion_requirements)
+            sut.add_students("John Doe johnd@email.net")
+            sut.add_points("6b86b273ff 8 7 7 5")
+
+            sut.add_course("Docker", 100)
+            sut.add_students("Jane Spark jspark@yahoo.com")
+            assert sut.students[0]["course_points"]["Docker"] == 0
+            sut.add_points("6b86b273ff 1 0 0 0 120")
+            sut.add_points_bulk(["d4735e3a26 0 0 0 0 30", "d4735e3a26 8 0 0 0"])
+            capsys.readouterr()
+
+            assert sut.students[0]["course_points"]["Python"] == 9
+            assert sut.students[0]["course_points"]["Docker"] == 120
+            assert sut.top_k("Docker", 2) == [("6b86b273ff", 120), ("d4735e3a26", 30)]
+            assert sut.verify_course_totals()
+            notification.notify_completions(sut.drain_completions())
+            assert "You have accomplished our Docker course!" in capsys.readouterr().out
+            with pytest.raises(ValueError):
+                sut.add_course("docker", 50)
+
+
+class TestQueries:
+    def test_indexed_queries_match_a_full_scan(self):
+        rng = random.Random(11)
+        sut = LearningProgressTracker()
+        sut.add_students_bulk([f"John Doe john{i}@{rng.choice(['a.edu', 'b.edu', 'c.org'])}" for i in range(300)])
+        student_ids = [student["id"] for student in sut.students]
+        for _ in range(3):
+            sut.add_points_bulk([f"{rng.choice(student_ids)} {rng.randrange(300)} {rng.randrange(250)} 0 "
+                                 f"{rng.randrange(300)}" for _ in range(300)])
+        for student_id in student_ids[:50]:
+            sut.add_points(f"{student_id} 0 {rng.randrange(200)} 0 0")
+
+        def scan(course, low, high):
+            return sorted(((student["id"], student["course_points"][course]) for student in sut.students
+                           if low <= student["course_points"][course] <= high and student["course_points"][course]),
+                          key=lambda learner: (-learner[1], learner[0]))
+
+        for _ in range(2):
+            assert [student["id"] for student in sut.query_completed("DSA")] == [
+                student["id"] for student in sut.students if student["course_points"]["DSA"] >= 400]
+            assert sut.query_points_range("Python", 100, 300) == scan("Python", 100, 300)
+            assert sut.query_points_range("Flask", 0, 20) == scan("Flask", 0, 20)
+            # 50% of Flask is 275 points, 90% is 495
+            assert sut.query_completion_range("Flask", 50, 90) == scan("Flask", 275, 495)
+            assert sut.query_completion_range("DSA", "12.5", 100) == scan("DSA", 50, 10 ** 9)
+            assert sut.query_email_domain("@C.org") == [student for student in sut.students
+                                                        if student["email"].endswith("@c.org")]
+            sut.rebuild_course_indexes()
+
+        completed_id = sut.query_completed("DSA")[0]["id"]
+        assert sut.has_completed(completed_id, "DSA")
+        assert not sut.has_completed(completed_id, "Databases")
+        assert sut.query_email_domain("nowhere.com") == []
+
+    def test_query_command(self, capsys, monkeypatch):
+        sut = LearningProgressTracker()
+        sut.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com"])
+        sut.add_points_bulk(["6b86b273ff 300 400 0 0", "d4735e3a26 540 0 0 0"])
+        answers = iter(["completed dsa", "percent python 50 90", "points flask 1 10", "domain yahoo.com",
+                        "points python x 5", "back"])
+        monkeypatch.setattr("builtins.input", lambda: next(answers))
+
+        UserMenu(sut).query_command()
+
+        assert capsys.readouterr().out == ("Enter a query or 'back' to return:\n"
+                                           "6b86b273ff\n"
+                                           "d4735e3a26   540        90.0%\n"
+                                           "6b86b273ff   300        50.0%\n"
+                                           "No students found.\n"
+                                           "d4735e3a26\n"
+                                           "Incorrect query.\n")
+
+
+class TestColumnarStore:
+    def test_columnar_students_expose_the_same_per_student_api(self, capsys):
+        sut = LearningProgressTracker(columnar=True)
+        sut.add_students("John Smith jsmith@hotmail.com")
+        sut.add_students("Robert Jemison Van de Graaff robertvdgraaff@mit.edu")
+
+        sut.add_points("d4735e3a26 4 11 0 1")
+        sut.add_points("6b86b273ff 0 0 0 5")
+        sut.print_student_points("d4735e3a26")
+
+        assert capsys.readouterr().out.strip().split('\n')[-1] == "d4735e3a26 points: Python=4; DSA=11; Databases=0; Flask=1."
+        assert sut.students[0]["course_points"] == {'Python': 0, 'DSA': 0, 'Databases': 0, 'Flask': 5}
+        assert sut.students[1]["course_submissions"] == {'Python': 1, 'DSA': 1, 'Databases': 0, 'Flask': 1}
+        assert list(sut.course_store.points_columns[1]) == [0, 11]
+
+    def test_columnar_students_only_keep_their_row(self):
+        sut = LearningProgressTracker(columnar=True)
+        sut.add_students_bulk(["John Doe johnd@email.net"])
+        student = sut.students[0]
+
+        student.course_points["DSA"] = 3
+        assert not hasattr(student, "__dict__")
+        assert student.row == 0
+        assert student["course_points"]["DSA"] == 3
+        assert sut.course_store.points_columns[1][0] == 3
+
+    def test_column_totals_match_row_by_row_statistics(self):
+        sut = LearningProgressTracker(columnar=True)
+        row_statistics = Statistics(sut.courses, sut.course_completion_requirements)
+        column_statistics = Statistics(sut.courses, sut.course_completion_requirements)
+
+        sut.add_students("John Doe johnd@email.net")
+        sut.add_students("Jane Spark jspark@yahoo.com")
+        sut.add_points("6b86b273ff 8 7 7 5")
+        sut.add_points("6b86b273ff 7 6 9 7")
+        sut.add_points("d4735e3a26 8 0 8 6")
+
+        row_statistics.calculate_course_statistics(sut.students)
+        column_statistics.calculate_course_statistics_from_store(sut.course_store)
+
+        assert column_statistics.get_statistics() == row_statistics.get_statistics()
+        assert sut.course_store.column_totals() == row_statistics.calculate_course_totals(sut.students)
+
+    def test_numpy_engine_matches_pure_python_statistics(self, monkeypatch):
+        pytest.importorskip("numpy")
+        import progress_tracker
+
+        rng = random.Random(5)
+        sut = LearningProgressTracker(columnar=True)
+        numpy_statistics, python_statistics = [Statistics(sut.courses, sut.course_completion_requirements)
+                                               for _ in range(2)]
+        numpy_statistics.calculate_course_statistics_from_store(sut.course_store)
+        assert set(numpy_statistics.get_statistics().values()) == {"n/a"}
+
+        sut.add_students_bulk([f"John Doe john{i}@email.net" for i in range(30)])
+        # Equal points in every course tie all courses for every statistic
+        sut.add_points("6b86b273ff 5 5 5 5")
+        for i in range(60):
+            student_id = rng.choice(sut.students)["id"]
+            # Few distinct values make ties between courses likely
+            sut.add_points(f"{student_id} {rng.choice([0, 2, 4])} {rng.choice([0, 2, 4])} {rng.choice([0, 4])} 0")
+            numpy_statistics.calculate_course_statistics_from_store(sut.course_store)
+            with monkeypatch.context() as patch:
+                patch.setattr(progress_tracker, "np", None)
+                python_statistics.calculate_course_statistics_from_store(sut.course_store)
+            assert numpy_statistics.get_statistics() == python_statistics.get_statistics()
+
+
+class TestSnapshots:
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_snapshot_keeps_its_point_in_time_view(self, columnar, capsys):
+        sut = LearningProgressTracker(columnar=columnar)
+        sut.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com"])
+        sut.add_points("6b86b273ff 8 7 0 0")
+        sut.add_points("d4735e3a26 600 0 0 0")
+
+        snapshot = sut.take_snapshot()
+        sut.add_points("6b86b273ff 700 1 0 0")
+        sut.add_students("Jim Lo jlo@email.net")
+
+        assert len(snapshot.students) == 2
+        assert snapshot.find_student_by_id("4e07408562") is None
+        assert snapshot.find_student_by_email("JohnD@email.net")["course_points"]["Python"] == 8
+        assert snapshot.course_totals() == ({"Python": 2, "DSA": 1, "Databases": 0, "Flask": 0},
+                                            {"Python": 2, "DSA": 1, "Databases": 0, "Flask": 0},
+                                            {"Python": 608, "DSA": 7, "Databases": 0, "Flask": 0})
+        assert snapshot.leaderboards["Python"].top_k(5) == [("d4735e3a26", 600), ("6b86b273ff", 8)]
+        assert sut.students[0]["course_points"]["Python"] == 708
+
+        notification = Notification(snapshot.courses, snapshot.course_completion_requirements)
+        notification.notify_students(snapshot.students)
+        assert capsys.readouterr().out.endswith("Total 1 students have been notified.\n")
+        snapshot.close()
+
+    def test_columnar_snapshot_shares_columns_until_they_change(self):
+        sut = LearningProgressTracker(columnar=True)
+        sut.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com"])
+        sut.add_points("6b86b273ff 8 7 0 0")
+        store = sut.course_store
+        columns = list(store.points_columns)
+
+        with sut.take_snapshot() as snapshot:
+            assert snapshot.points_columns == columns
+            assert all(mine is live for mine, live in zip(snapshot.points_columns, store.points_columns))
+            sut.add_points("d4735e3a26 0 5 0 0")
+            assert store.points_columns[0] is columns[0]
+            assert store.points_columns[1] is not columns[1]
+            assert list(columns[1]) == [7, 0]
+            with pytest.raises(TypeError):
+                snapshot.students[0]["course_points"]["DSA"] = 1
+
+        sut.add_points("d4735e3a26 3 0 0 0")
+        assert store.points_columns[0] is columns[0]
+        assert store.shared_columns == {}
+
+    def test_snapshot_during_concurrent_updates_is_consistent(self):
+        sut = LearningProgressTracker(columnar=True, thread_safe=True)
+        ids = [sut.register_student(f"John{i}", "Doe", f"john{i}@email.net") for i in range(50)]
+        lines = [f"{student_id} 1 2 0 1" for student_id in ids] * 20
+        threads = [threading.Thread(target=sut.add_points_bulk, args=(lines[i::4],)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+
+        snapshots = [sut.take_snapshot() for _ in range(20)]
+        for thread in threads:
+            thread.join()
+
+        for snapshot in snapshots:
+            statistics = Statistics(snapshot.courses, snapshot.course_completion_requirements)
+            assert statistics.calculate_course_totals(snapshot.students) == snapshot.course_totals()
+            snapshot.close()
+
+
 class TestStatistics:
     def test_calculating_statistics_with_data_available(self):
         sut = LearningProgressTracker()
@@ -134,6 +597,22 @@ class TestStatistics:
             "HC": "Flask"
         }, "Course statistics do not match the expected result"
 
+    def test_running_course_totals_match_full_recomputation(self):
+        for columnar in (False, True):
+            sut = LearningProgressTracker(columnar=columnar)
+            sut.add_students("John Doe johnd@email.net")
+            sut.add_students("Jane Spark jspark@yahoo.com")
+            sut.add_students("Ann Lee alee@yahoo.com")
+
+            sut.add_points("6b86b273ff 8 7 7 5")
+            sut.add_points("6b86b273ff 7 6 9 0")
+            sut.add_points_bulk(["d4735e3a26 8 0 8 6", "d4735e3a26 7 0 0 0"])
+
+            assert sut.enrollment_totals == {"Python": 2, "DSA": 1, "Databases": 2, "Flask": 2}
+            assert sut.submission_totals == {"Python": 4, "DSA": 2, "Databases": 3, "Flask": 2}
+            assert sut.point_totals == {"Python": 30, "DSA": 13, "Databases": 24, "Flask": 11}
+            assert sut.verify_course_totals(), "Running totals diverged from a full recomputation"
+
     def test_calculating_statistics_with_no_data_available(self):
         sut = LearningProgressTracker()
         statistics = Statistics(sut.courses, sut.course_completion_requirements)
@@ -147,6 +626,30 @@ class TestStatistics:
             "HC": "n/a"
         }, "No statistics should be available when there are no students"
 
+    def test_rendered_learner_pages_are_cached_until_their_course_changes(self, monkeypatch):
+        sut = LearningProgressTracker()
+        statistics = Statistics(sut.courses, sut.course_completion_requirements)
+        sut.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com"])
+        sut.add_points_bulk(["6b86b273ff 27 10 0 0", "d4735e3a26 24 0 0 0"])
+        completions = []
+        calculate_course_completion = statistics.calculate_course_completion
+        monkeypatch.setattr(statistics, "calculate_course_completion",
+                            lambda course, points: completions.append(course) or
+                            calculate_course_completion(course, points))
+
+        page = statistics.render_course_learners_page("python", sut.leaderboards, 0, 10)
+        assert page == "6b86b273ff   27         4.5%\nd4735e3a26   24         4.0%\n"
+        assert statistics.render_course_learners_page("python", sut.leaderboards, 0, 10) is page
+        assert completions == ["Python", "Python"]
+
+        sut.add_points("d4735e3a26 0 5 0 0")
+        assert statistics.render_course_learners_page("python", sut.leaderboards, 0, 10) is page
+        assert completions == ["Python", "Python"], "A change in DSA should keep the Python pages"
+
+        sut.add_points("d4735e3a26 4 0 0 0")
+        assert statistics.render_course_learners_page("python", sut.leaderboards, 0, 10) == (
+            "d4735e3a26   28         4.7%\n6b86b273ff   27         4.5%\n")
+
     def test_top_learners_course_info_is_shown_in_correct_format(self, capsys):
         sut = LearningProgressTracker()
         statistics = Statistics(sut.courses, sut.course_completion_requirements)
@@ -186,6 +689,69 @@ class TestStatistics:
         assert output_lines[1] == "id           points     completed", "Expected a line with 'id', 'points', 'completed'"
 
 
+class TestLeaderboard:
+    def test_leaderboard_keeps_points_desc_id_asc_order(self, monkeypatch):
+        monkeypatch.setattr(Leaderboard, "BLOCK_SIZE", 4)
+        rng = random.Random(7)
+        sut = Leaderboard()
+        expected = {}
+        for _ in range(500):
+            student_id = f"{rng.randrange(60):02d}"
+            expected[student_id] = expected.get(student_id, 0) + rng.randrange(1, 20)
+            sut.update(student_id, expected[student_id])
+
+        ordered = sorted(expected.items(), key=lambda item: (-item[1], item[0]))
+        assert list(sut.iter_range()) == ordered
+        assert len(sut.blocks) > 1, "Expected the leaderboard to be split into several blocks"
+        assert sut.top_k(5) == ordered[:5]
+        assert list(sut.iter_range(17, 9)) == ordered[17:26]
+        assert [sut.rank(student_id) for student_id, _ in ordered] == list(range(len(ordered)))
+        assert sut.rank("missing") is None
+
+    def test_rank_and_offsets_follow_split_and_dropped_blocks(self, monkeypatch):
+        monkeypatch.setattr(Leaderboard, "BLOCK_SIZE", 2)
+        sut = Leaderboard()
+        expected = {f"{i:02d}": i for i in range(40)}
+        for student_id, points in expected.items():
+            sut.update(student_id, points)
+        for student_id in ["00", "01", "02", "03", "04", "05", "20", "21"]:
+            expected[student_id] += 100
+            sut.update(student_id, expected[student_id])
+        sut.update_many({"10": 500, "11": 500})
+        expected.update({"10": 500, "11": 500})
+
+        ordered = sorted(expected.items(), key=lambda item: (-item[1], item[0]))
+        assert [sut.rank(student_id) for student_id, _ in ordered] == list(range(len(ordered)))
+        assert [next(sut.iter_range(offset)) for offset in range(len(ordered))] == ordered
+        assert list(sut.iter_range(len(ordered))) == []
+
+        sut.rebuild(dict.fromkeys(expected, 1))
+        assert [sut.rank(student_id) for student_id in sorted(expected)] == list(range(len(expected)))
+        assert list(sut.iter_range(38)) == [("38", 1), ("39", 1)]
+
+    def test_tracker_leaderboard_prints_same_rows_as_full_sort(self, capsys):
+        sut = LearningProgressTracker()
+        statistics = Statistics(sut.courses, sut.course_completion_requirements)
+        sut.add_students("John Smith jsmith@hotmail.com")
+        sut.add_students("Robert Jemison Van de Graaff robertvdgraaff@mit.edu")
+        sut.add_students("Jane Spark jspark@yahoo.com")
+        sut.add_points("d4735e3a26 10 11 0 1")
+        sut.add_points("4e07408562 7 0 0 0")
+        sut.add_points("6b86b273ff 3 7 0 5")
+        sut.add_points("4e07408562 3 0 0 0")
+        capsys.readouterr()
+
+        statistics.show_course_top_learners("python", sut.students)
+        sorted_output = capsys.readouterr().out
+        UserMenu(sut).show_course_learners("python")
+
+        assert capsys.readouterr().out == sorted_output
+        assert sut.top_k("Python", 2) == [("4e07408562", 10), ("d4735e3a26", 10)]
+        assert sut.course_learners_page("Python", 2, 5) == [("6b86b273ff", 3)]
+        assert sut.course_rank("Python", "d4735e3a26") == 1
+        assert sut.course_rank("Databases", "d4735e3a26") is None
+
+
 class TestNotification:
     def test_notify_student_who_completed_multiple_courses(self, capsys):
         sut = LearningProgressTracker()
@@ -203,10 +769,10 @@ class TestNotification:
         last_output = captured.out.strip().split('\n')[-1]
 
         assert last_output == "Total 1 students have been notified.", "The number of students is different from the expected result"
-        assert notification.notified_students == {'Python': ['6b86b273ff'],
-                                                  'DSA': ['6b86b273ff'],
-                                                  'Databases': [],
-                                                  'Flask': []}, "Notified students data does not match the expected result"
+        assert notification.notified_students == {'Python': {'6b86b273ff'},
+                                                  'DSA': {'6b86b273ff'},
+                                                  'Databases': set(),
+                                                  'Flask': set()}, "Notified students data does not match the expected result"
 
     def test_notify_students_who_completed_the_same_course(self, capsys):
         sut = LearningProgressTracker()
@@ -224,10 +790,10 @@ class TestNotification:
         last_output = captured.out.strip().split('\n')[-1]
 
         assert last_output == "Total 2 students have been notified.", "The number of students is different from the expected result"
-        assert notification.notified_students == {'Python': [],
-                                                  'DSA': [],
-                                                  'Databases': [],
-                                                  'Flask': ['6b86b273ff', 'd4735e3a26']}, "Notified students data does not match the expected result"
+        assert notification.notified_students == {'Python': set(),
+                                                  'DSA': set(),
+                                                  'Databases': set(),
+                                                  'Flask': {'6b86b273ff', 'd4735e3a26'}}, "Notified students data does not match the expected result"
 
     def test_notification_about_completed_course_is_sent_only_once(self, capsys):
         sut = LearningProgressTracker()
@@ -242,10 +808,10 @@ class TestNotification:
         last_output = captured.out.strip().split('\n')[-1]
 
         assert last_output == "Total 0 students have been notified.", "The number of students is different from the expected result"
-        assert notification.notified_students == {'Python': [],
-                                                  'DSA': [],
-                                                  'Databases': ['6b86b273ff'],
-                                                  'Flask': []}, "Notified students data does not match the expected result"
+        assert notification.notified_students == {'Python': set(),
+                                                  'DSA': set(),
+                                                  'Databases': {'6b86b273ff'},
+                                                  'Flask': set()}, "Notified students data does not match the expected result"
 
     def test_notification_format_is_correct(self, capsys):
         sut = LearningProgressTracker()
@@ -263,6 +829,116 @@ class TestNotification:
                                       "Hello, Jean-Claude O'Connor! You have accomplished our Databases course!"], "The email format does not match the expected format"
 
 
+class TestUserMenu:
+    def test_list_is_paginated_and_stops_on_back(self, capsys, monkeypatch):
+        sut = LearningProgressTracker()
+        sut.add_students_bulk([f"John Doe john{i}@email.net" for i in range(5)])
+        menu = UserMenu(sut, page_size=2)
+        answers = iter(["next", "back"])
+        monkeypatch.setattr("builtins.input", lambda: next(answers))
+
+        menu.list_students_command()
+
+        ids = [student["id"] for student in sut.students]
+        assert capsys.readouterr().out.split("\n")[:-1] == ["Students:", ids[0], ids[1],
+                                                            "Enter 'next' to see more or 'back' to return:",
+                                                            ids[2], ids[3],
+                                                            "Enter 'next' to see more or 'back' to return:"]
+
+    def test_course_learners_are_streamed_from_an_offset(self, capsys):
+        sut = LearningProgressTracker()
+        sut.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com"])
+        sut.add_points_bulk(["6b86b273ff 27 0 0 0", "d4735e3a26 24 0 0 0"])
+        menu = UserMenu(sut)
+
+        menu.show_course_learners("python", offset=1)
+
+        assert capsys.readouterr().out == ("Python\n"
+                                           "id           points     completed\n"
+                                           "d4735e3a26   24         4.0%\n")
+
+
+    def test_queued_completions_notify_like_a_full_scan(self, capsys):
+        sut = LearningProgressTracker()
+        scanning = Notification(sut.courses, sut.course_completion_requirements)
+        queued = Notification(sut.courses, sut.course_completion_requirements)
+
+        sut.add_students("John Doe johnd@email.net")
+        sut.add_students("Jane Spark jspark@yahoo.com")
+        sut.add_points("d4735e3a26 0 121 56 554")
+        sut.add_points("6b86b273ff 600 300 0 12")
+        sut.add_points("6b86b273ff 0 100 0 0")
+        sut.add_points("6b86b273ff 0 100 0 0")
+        capsys.readouterr()
+
+        scanning.notify_students(sut.students)
+        scan_output = capsys.readouterr().out
+        queued.notify_completions(sut.drain_completions())
+
+        assert capsys.readouterr().out == scan_output
+        assert queued.notified_students == scanning.notified_students
+        assert sut.drain_completions() == [], "Expected the completion queue to be emptied"
+
+    def test_notifications_are_delivered_in_batches_through_a_sender(self, capsys, tmp_path):
+        sut = LearningProgressTracker()
+        path = tmp_path / "outbox.txt"
+        notification = Notification(sut.courses, sut.course_completion_requirements,
+                                    sender=FileSender(path), delivery_batch_size=2, max_concurrent_batches=2)
+
+        sut.add_students_bulk([f"John Doe john{i}@email.net" for i in range(5)])
+        sut.add_points_bulk([(student["id"], 0, 400, 0, 0) for student in sut.students])
+        notification.notify_completions(sut.drain_completions())
+
+        assert capsys.readouterr().out == "Total 5 students have been notified.\n"
+        outbox = path.read_text()
+        assert outbox.count("Re: Your Learning Progress") == 5
+        assert "To: john3@email.net\nRe: Your Learning Progress\nHello, John Doe! You have accomplished our DSA course!" in outbox
+
+
+class TestScriptMode:
+    def test_script_runs_without_prompts_through_one_output(self, capsys):
+        menu = UserMenu(LearningProgressTracker())
+        output = io.StringIO()
+        script = ["add students\n", "John Doe johnd@email.net\n", "back\n",
+                  "add points\n", "6b86b273ff 1 0 0 0\n", "back\n", "list\n", "exit\n", "list\n"]
+
+        menu.run_script(script, output)
+
+        assert capsys.readouterr().out == ""
+        assert output.getvalue() == ("The student has been added.\n"
+                                     "Total 1 students have been added.\n"
+                                     "Points updated.\n"
+                                     "Students:\n"
+                                     "6b86b273ff\n"
+                                     "Bye!\n")
+
+    def test_script_writes_one_json_object_per_command(self):
+        menu = UserMenu(LearningProgressTracker())
+        output = io.StringIO()
+
+        menu.run_script(["add students", "John Doe johnd@email.net", "back", "frobnicate", "find", "1000"],
+                        output, jsonl=True)
+
+        assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+            {"command": "add students", "input": ["John Doe johnd@email.net", "back"],
+             "output": ["The student has been added.", "Total 1 students have been added."]},
+            {"command": "frobnicate", "input": [], "output": ["Unknown command."]},
+            {"command": "find", "input": ["1000"], "output": ["No student is found for id=1000."]}]
+
+    def test_page_size_option_does_not_page_scripts(self, tmp_path, capfd):
+        script = tmp_path / "commands.txt"
+        script.write_text("add students\nJohn Doe johnd@email.net\nJane Spark jspark@yahoo.com\n"
+                          "Jean Doe jdoe@email.net\nback\nlist\nfind\n6b86b273ff\nback\nexit\n")
+
+        main(["--script", str(script), "--page-size", "1"])
+
+        assert capfd.readouterr().out.split("Students:\n")[1] == (
+            "6b86b273ff\nd4735e3a26\n4e07408562\n"
+            "6b86b273ff points: Python=0; DSA=0; Databases=0; Flask=0.\nBye!\n")
+        with pytest.raises(SystemExit):
+            main(["--page-size", "0"])
+
+
 def test_should_only_add_students_that_match_credential_requirements():
     sut = LearningProgressTracker()
 
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+from progress_tracker import LearningProgressTracker
+from server import TrackerServer
+
+
+async def send_requests(port, requests):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    responses = []
+    for request in requests:
+        writer.write(request.encode() + b"\n")
+        await writer.drain()
+        responses.append(json.loads(await reader.readline()))
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+async def run_with_server(tracker, scenario):
+    server = await TrackerServer(tracker).start()
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await scenario(port)
+
+
+async def send_raw_requests(port, requests):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"".join(requests))
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for _ in requests]
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+class TestTrackerServer:
+    def test_local_client_can_use_every_command(self):
+        tracker = LearningProgressTracker()
+
+        async def scenario(port):
+            return await send_requests(port, ["ADD_STUDENT John Doe johnd@email.net",
+                                              "ADD_STUDENT Jane",
+                                              "ADD_POINTS 6b86b273ff 8 400 7 5",
+                                              "ADD_POINTS 1000 1 1 1 1",
+                                              "FIND 6b86b273ff",
+                                              "STATISTICS",
+                                              "TOP dsa 5",
+                                              "TOP java",
+                                              "NOTIFY",
+                                              "NOTIFY",
+                                              "DANCE"])
+
+        responses = asyncio.run(run_with_server(tracker, scenario))
+
+        assert responses == [
+            {"ok": True, "id": "6b86b273ff"},
+            {"ok": False, "error": "Incorrect credentials."},
+            {"ok": True},
+            {"ok": False, "error": "No student is found for id=1000."},
+            {"ok": True, "id": "6b86b273ff",
+             "points": {"Python": 8, "DSA": 400, "Databases": 7, "Flask": 5},
+             "submissions": {"Python": 1, "DSA": 1, "Databases": 1, "Flask": 1}},
+            {"ok": True, "statistics": {"MP": "Python, DSA, Databases, Flask", "LP": "n/a",
+                                        "HA": "Python, DSA, Databases, Flask", "LA": "n/a",
+                                        "EC": "DSA", "HC": "Flask"}},
+            {"ok": True, "learners": [["6b86b273ff", 400, 100.0]]},
+            {"ok": False, "error": "Unknown course."},
+            {"ok": True, "notified": 1,
+             "messages": ["To: johnd@email.net\nRe: Your Learning Progress\n"
+                          "Hello, John Doe! You have accomplished our DSA course!"]},
+            {"ok": True, "notified": 0, "messages": []},
+            {"ok": False, "error": "Unknown command."}]
+
+    def test_concurrent_clients_see_every_write(self):
+        tracker = LearningProgressTracker()
+        tracker.add_students_bulk([f"John Doe john{i}@email.net" for i in range(10)])
+        student_ids = [student["id"] for student in tracker.students]
+
+        async def scenario(port):
+            clients = [send_requests(port, [f"ADD_POINTS {student_id} 1 0 0 0" for student_id in student_ids])
+                       for _ in range(20)]
+            await asyncio.gather(*clients)
+            return await send_requests(port, ["TOP python 1"])
+
+        responses = asyncio.run(run_with_server(tracker, scenario))
+
+        assert tracker.point_totals["Python"] == 200
+        assert tracker.submission_totals["Python"] == 200
+        assert responses == [{"ok": True, "learners": [[min(student_ids), 20, 3.3]]}]
+
+    def test_bad_requests_are_answered_and_keep_the_connection(self, monkeypatch):
+        tracker = LearningProgressTracker()
+        tracker.add_students("John Doe johnd@email.net")
+        monkeypatch.setattr(tracker, "add_points_bulk", lambda lines: 1 / 0)
+
+        async def scenario(port):
+            return await send_raw_requests(port, [b"FIND \xff\xfe\n",
+                                                  b"FIND " + b"1" * 100_000 + b"\n",
+                                                  b"ADD_POINTS 6b86b273ff 1 1 1 1\n",
+                                                  b"FIND 6b86b273ff\n"])
+
+        responses = asyncio.run(run_with_server(tracker, scenario))
+
+        assert responses[:3] == [{"ok": False, "error": "Request is not valid UTF-8."},
+                                 {"ok": False, "error": "Request is too long."},
+                                 {"ok": False, "error": "Internal error: ZeroDivisionError."}]
+        assert responses[3]["id"] == "6b86b273ff"
@@ -0,0 +1,222 @@
+import pytest
+
+from progress_tracker import LearningProgressTracker
+from progress_tracker import Notification
+from progress_tracker import Statistics
+from storage import TrackerStore
+
+
+def create_tracker():
+    tracker = LearningProgressTracker()
+    notification = Notification(tracker.courses, tracker.course_completion_requirements)
+    return tracker, notification
+
+
+class TestTrackerStore:
+    def test_tracker_state_survives_a_restart(self, tmp_path):
+        path = tmp_path / "tracker.db"
+        tracker, notification = create_tracker()
+        store = TrackerStore(path)
+        store.load(tracker, notification)
+
+        tracker.add_students("John Doe johnd@email.net")
+        tracker.add_students("Jane Spark jspark@yahoo.com")
+        tracker.add_points("6b86b273ff 8 400 7 5")
+        tracker.add_points("d4735e3a26 8 0 8 6")
+        tracker.add_points("d4735e3a26 7 0 0 0")
+        notification.notify_students(tracker.students)
+        store.close()
+
+        restored, restored_notification = create_tracker()
+        restored_store = TrackerStore(path)
+        restored_store.load(restored, restored_notification)
+
+        assert [student["id"] for student in restored.students] == ["6b86b273ff", "d4735e3a26"]
+        assert restored.students[1]["course_points"] == {'Python': 15, 'DSA': 0, 'Databases': 8, 'Flask': 6}
+        assert restored.students[1]["course_submissions"] == {'Python': 2, 'DSA': 0, 'Databases': 1, 'Flask': 1}
+        assert restored.enrollment_totals == tracker.enrollment_totals
+        assert restored.top_k("Python", 2) == tracker.top_k("Python", 2)
+        assert restored_notification.notified_students["DSA"] == {"6b86b273ff"}
+        assert not restored.is_email_unique("jspark@yahoo.com")
+
+        restored.add_students("Ann Lee alee@yahoo.com")
+        assert restored.students[2]["id"] == "4e07408562", "Expected id allocation to continue after a restart"
+        restored_store.close()
+
+    def test_columnar_tracker_loads_the_saved_counts_into_columns(self, tmp_path):
+        path = tmp_path / "tracker.db"
+        tracker, notification = create_tracker()
+        store = TrackerStore(path)
+        store.load(tracker, notification)
+        tracker.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com",
+                                   "Ann Lee alee@yahoo.com"])
+        tracker.add_points("6b86b273ff 8 400 7 5")
+        tracker.add_points("d4735e3a26 600 0 8 6")
+        store.flush()
+        tracker.add_course("SQL", 300)
+        tracker.add_points("d4735e3a26 1 0 0 0 300")
+        store.close()
+
+        catalog = {"Python": 600, "DSA": 400, "Databases": 480, "Flask": 550, "SQL": 300}
+        restored = LearningProgressTracker(columnar=True, course_catalog=catalog)
+        TrackerStore(path).load(restored, Notification(restored.courses, restored.course_completion_requirements))
+        reference = LearningProgressTracker(course_catalog=catalog)
+        TrackerStore(path).load(reference, Notification(reference.courses, reference.course_completion_requirements))
+
+        assert [dict(student["course_points"]) for student in restored.students] == [
+            {"Python": 8, "DSA": 400, "Databases": 7, "Flask": 5, "SQL": 0},
+            {"Python": 601, "DSA": 0, "Databases": 8, "Flask": 6, "SQL": 300},
+            {"Python": 0, "DSA": 0, "Databases": 0, "Flask": 0, "SQL": 0}]
+        assert list(restored.students) == reference.students
+        assert restored.email_index["alee@yahoo.com"] == restored.student_index["4e07408562"] == 2
+        for course in catalog:
+            assert restored.top_k(course, 3) == reference.top_k(course, 3)
+        assert restored.completion_queue == reference.completion_queue == [(0, 1), (1, 0), (1, 4)]
+        assert restored.verify_course_totals()
+
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_counts_survive_a_reordered_and_smaller_catalog(self, tmp_path, capsys, columnar):
+        path = tmp_path / "tracker.db"
+
+        def reopen(catalog=None):
+            tracker = LearningProgressTracker(columnar=columnar, course_catalog=catalog)
+            store = TrackerStore(path)
+            store.load(tracker, Notification(tracker.courses, tracker.course_completion_requirements))
+            return tracker, store
+
+        tracker, store = reopen()
+        tracker.add_students("John Doe j@d.net")
+        tracker.add_points("6b86b273ff 10 20 30 40")
+        store.close()
+
+        tracker, store = reopen({"Flask": 550, "Python": 600})
+        assert dict(tracker.students[0]["course_points"]) == {"Flask": 40, "Python": 10}
+        tracker.add_points("6b86b273ff 5 1")
+        tracker.add_students("Jane Spark jspark@yahoo.com")
+        tracker.add_points("d4735e3a26 7 0")
+        store.close()
+        tracker, store = reopen({"Flask": 550, "Python": 600})
+        store.close()
+
+        tracker, store = reopen()
+        assert [dict(student["course_points"]) for student in tracker.students] == [
+            {"Python": 11, "DSA": 20, "Databases": 30, "Flask": 45},
+            {"Python": 0, "DSA": 0, "Databases": 0, "Flask": 7}]
+        assert dict(tracker.students[0]["course_submissions"]) == {"Python": 2, "DSA": 1, "Databases": 1, "Flask": 2}
+        assert tracker.top_k("DSA", 2) == [("6b86b273ff", 20)]
+        store.close()
+        capsys.readouterr()
+
+    def test_columnar_restart_restores_the_saved_image(self, tmp_path, capsys):
+        path = tmp_path / "tracker.db"
+
+        def reopen(columnar=True):
+            tracker = LearningProgressTracker(columnar=columnar)
+            notification = Notification(tracker.courses, tracker.course_completion_requirements)
+            store = TrackerStore(path)
+            store.load(tracker, notification)
+            return tracker, notification, store
+
+        def assert_same_state(restored, reference):
+            assert list(restored.students) == reference.students
+            for course in restored.courses:
+                assert restored.top_k(course, 5) == reference.top_k(course, 5)
+                assert restored.query_completed(course) == reference.query_completed(course)
+            assert restored.verify_course_totals()
+            assert restored.query_email_domain("yahoo.com") == reference.query_email_domain("yahoo.com")
+            assert restored.find_student_by_id("d4735e3a26") == reference.find_student_by_id("d4735e3a26")
+
+        tracker, notification, store = reopen()
+        tracker.add_students_bulk(["John Doe johnd@email.net", "Jane Spark jspark@yahoo.com",
+                                   "Ann Lee alee@yahoo.com"])
+        tracker.add_points("6b86b273ff 8 400 7 5")
+        tracker.add_points("d4735e3a26 600 0 8 6")
+        tracker.add_points("4e07408562 8 0 0 6")
+        notification.notify_completions(tracker.drain_completions())
+        tracker.add_points("4e07408562 0 400 0 0")
+        store.close()
+
+        restored, restored_notification, store = reopen()
+        assert store.image_current
+        assert restored._student_index is None and set(restored.leaderboards.ranked) == set(restored.courses)
+        reference, _, reference_store = reopen(columnar=False)
+        assert_same_state(restored, reference)
+        # The queue holds what was not drained yet, a load row by row queues every completion again
+        assert restored.completion_queue == [(2, 1)]
+        assert restored_notification.notified_students["DSA"] == {"6b86b273ff"}
+        reference_store.close()
+
+        # Changes after a restore are saved with the next image
+        restored.add_points("4e07408562 0 0 480 0")
+        restored.add_students("Max Low max@yahoo.com")
+        restored.add_points("4b227777d4 1 0 0 0")
+        store.close()
+        restored, _, store = reopen()
+        assert store.image_current
+        reference, _, reference_store = reopen(columnar=False)
+        assert_same_state(restored, reference)
+        reference_store.close()
+
+        # Rows written without an image after them are read row by row
+        restored.add_points("6b86b273ff 1 0 0 0")
+        store.flush()
+        restored, _, store = reopen()
+        assert not store.image_current and restored._student_index is not None
+        assert restored.students[0]["course_points"]["Python"] == 9
+        store.close()
+        capsys.readouterr()
+
+    def test_changes_are_written_in_batches(self, tmp_path):
+        path = tmp_path / "tracker.db"
+        tracker, notification = create_tracker()
+        store = TrackerStore(path, batch_size=3)
+        store.load(tracker, notification)
+
+        tracker.add_students("John Doe johnd@email.net")
+        tracker.add_points("6b86b273ff 1 0 0 0")
+        tracker.add_points("6b86b273ff 1 0 0 0")
+        assert store.connection.execute("SELECT COUNT(*) FROM students").fetchone() == (0,)
+
+        tracker.add_students("Jane Spark jspark@yahoo.com")
+        assert store.connection.execute("SELECT COUNT(*) FROM students").fetchone() == (2,)
+        store.close()
+
+
+class TestBinarySnapshot:
+    def test_mapped_snapshot_answers_queries_like_the_tracker(self, tmp_path):
+        path = tmp_path / "tracker.snapshot"
+        tracker = LearningProgressTracker()
+        tracker.add_students("John Doe johnd@email.net")
+        tracker.add_students("Jane Spark jspark@yahoo.com")
+        tracker.add_students("Jean-Claude O'Connor jcda123@google.net")
+        tracker.add_points("6b86b273ff 8 7 7 5")
+        tracker.add_points("d4735e3a26 8 0 8 6")
+        tracker.add_points("4e07408562 20 0 0 0")
+        tracker.save_binary_snapshot(path)
+
+        snapshot = LearningProgressTracker.open_binary_snapshot(path)
+        statistics = Statistics(snapshot.courses, snapshot.course_completion_requirements)
+        statistics.update_statistics_from_totals(*snapshot.course_totals())
+        live_statistics = Statistics(tracker.courses, tracker.course_completion_requirements)
+        live_statistics.calculate_course_statistics(tracker.students)
+        snapshot_page = statistics.render_course_learners_page("python", snapshot.leaderboards, 0, 10)
+        live_page = live_statistics.render_course_learners_page("python", tracker.leaderboards, 0, 10)
+
+        assert snapshot.find_student_by_id("d4735e3a26") == tracker.students[1]
+        assert snapshot.find_student_by_email("jcda123@google.net")["last_name"] == "O'Connor"
+        assert snapshot.find_student_by_email("JCDA123@Google.net")["id"] == "4e07408562"
+        assert snapshot.find_student_by_id("1000") is None
+        assert statistics.get_statistics() == live_statistics.get_statistics()
+        assert snapshot.leaderboards["Python"].top_k(2) == tracker.top_k("Python", 2)
+        assert snapshot_page == live_page
+        snapshot.close()
+
+    def test_empty_tracker_snapshot_can_be_opened(self, tmp_path):
+        path = tmp_path / "tracker.snapshot"
+        LearningProgressTracker().save_binary_snapshot(path)
+
+        snapshot = LearningProgressTracker.open_binary_snapshot(path)
+        assert snapshot.student_count == 0
+        assert snapshot.find_student_by_id("6b86b273ff") is None
+        assert snapshot.leaderboards["DSA"].top_k(5) == []
+        snapshot.close()
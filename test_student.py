@@ -0,0 +1,39 @@
+import pytest
+
+from progress_tracker import LearningProgressTracker
+from student import Student
+
+
+def create_student():
+    return Student("6b86b273ff", "John", "Doe", "johnd@email.net", {"Python": 8}, {"Python": 1})
+
+
+class TestStudent:
+    def test_record_reads_like_a_dict(self):
+        student = create_student()
+
+        assert student["email"] == "johnd@email.net"
+        assert student.get("course_points") == {"Python": 8}
+        assert student == {"id": "6b86b273ff", "first_name": "John", "last_name": "Doe", "email": "johnd@email.net",
+                           "course_points": {"Python": 8}, "course_submissions": {"Python": 1}}
+        assert list(student) == list(Student.FIELDS)
+        assert "full_name" not in student
+        with pytest.raises(KeyError):
+            student["full_name"]
+        assert not hasattr(student, "__dict__")
+
+    def test_full_name_is_formatted_once_and_follows_name_changes(self):
+        student = create_student()
+
+        assert student.full_name == "John Doe"
+        assert student.full_name is student.full_name
+        student["last_name"] = "Smith"
+        assert student.full_name == "John Smith"
+
+    def test_registered_names_are_interned(self):
+        sut = LearningProgressTracker()
+        sut.add_students_bulk(["john doe johnd@email.net", "JOHN Doe jdoe@email.net"])
+
+        first, second = sut.students
+        assert first.first_name is second.first_name
+        assert first.last_name is second.last_name